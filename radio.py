@@ -2,28 +2,42 @@
 import discord
 from discord.ext import commands, tasks
 from discord.ui import Button, View
+from discord import app_commands
 
 # Essential System and Helper Libraries
 import asyncio
 import configparser
 import subprocess
+import json
 import re
 import os
 import sys
-
-# For System Information (only needed for !stats)
-import psutil
-import platform
-import pkg_resources
-
-# For Spotify Integration
+import io
+import mmap
+import time
+import hashlib
+import hmac
+import unicodedata
+import traceback
+import tracemalloc
+import shlex
+import threading
+import heapq
+import itertools
+import functools
+import collections
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse, parse_qs
+
+# For Spotify Integration and the local stream relay
+# (heavier modules like psutil, aiohttp.web, base64 and yt_dlp are imported on first use)
 import aiohttp
-import base64
 
 # For Timestamps and Logging
 import datetime
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Configure logging
 logging.basicConfig(
@@ -37,6 +51,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger('RadioBot')
 
+# Startup timeline: stage -> wall clock timestamp (imports, login, ready, first_audio)
+startup_timeline = {'imports': time.time()}
+
 # Load configuration file
 config = configparser.ConfigParser()
 config.read('config.ini')
@@ -59,10 +76,341 @@ current_station = "No station playing"
 current_title = "No title available"
 last_posted_title = None
 
+# Last known title per station URL (used for ICY metadata of the relay)
+station_titles = {}
+
+# Per-guild playback state: guild ID -> {'channel_id': ..., 'url': ..., 'title': ...}
+guild_playback = {}
+playback_state_save = None
+
+# Voice occupancy: channel ID -> IDs of the (non-bot) members in it
+voice_occupancy = collections.defaultdict(set)
+
+# Idle suspension: guilds whose stream is suspended and pending suspension timers
+suspended_guilds = set()
+idle_timers = {}
+
+# Cover image cache: canonical track key -> cover URL (least recently used first)
+cover_cache = collections.OrderedDict()
+COVER_CACHE_SIZE = 256
+
+# Precompiled rules for track identity normalization
+TRACK_SEPARATOR_RE = re.compile(r'\s+[-–—]\s+')
+TRACK_FEATURING_RE = re.compile(r'\s*[(\[]?\s*\b(?:feat|ft|featuring)\b\.?\s+[^)\]]*[)\]]?', re.IGNORECASE)
+TRACK_DECORATION_RE = re.compile(
+    r'\s*[(\[][^)\]]*\b(?:radio|edit|version|remaster(?:ed)?|explicit|clean|single|album|mono|stereo|original mix)\b[^)\]]*[)\]]'
+    r'|\s+-\s+(?:radio edit|single version|album version|(?:\d{4} )?remaster(?:ed)?(?: \d{4})?)$',
+    re.IGNORECASE
+)
+TRACK_ARTIST_SPLIT_RE = re.compile(r'\s*(?:,|&|\+|/|\bx\b|\band\b|\bvs\.?|\bund\b)\s*', re.IGNORECASE)
+
+# Slash commands are synced once per process
+commands_synced = False
+
+# Timeshift: station URL -> TimeshiftBuffer
+timeshift_buffers = {}
+
+# Seconds from process start to audio per restored guild
+restore_metrics = {}
+
+# Scheduled programming: heap of (fire timestamp, sequence, ScheduleEntry), driven by one task
+schedule_heap = []
+schedule_task = None
+
+# Local HTTP relay: station URL -> StationRelay
+station_relays = {}
+relay_runner = None
+
+# Profiling: only one profile runs at a time, the watchdog is started once
+profile_lock = asyncio.Lock()
+loop_watchdog = None
+
+# Resolved stream cache: station URL -> {'expires': monotonic deadline, 'mirrors': [stream URLs, fastest first]}
+resolved_streams = {}
+resolve_inflight = {}
+
+# Guilds whose playback was stopped on purpose (the next after-callback is not a mirror failure)
+requested_stops = set()
+
+# Shared outbound HTTP client (created in on_ready) and its per-host statistics
+http_session = None
+http_stats = collections.defaultdict(lambda: {
+    'requests': 0, 'errors': 0, 'latency': 0.0, 'max_latency': 0.0,
+    'new_connections': 0, 'reused_connections': 0, 'dns_misses': 0
+})
+
+# Wrappers that have to be expanded before ffmpeg gets the URL
+PLAYLIST_EXTENSIONS = ('.pls', '.m3u', '.m3u8')
+PLAYLIST_CONTENT_TYPES = (
+    'audio/x-scpls',
+    'audio/scpls',
+    'audio/x-mpegurl',
+    'audio/mpegurl',
+    'application/x-mpegurl',
+    'application/vnd.apple.mpegurl',
+    'application/pls+xml',
+)
+
+# yt-dlp media cache: page URL -> {'expires': unix timestamp, 'url': media URL, 'acodec': ..., 'title': ..., 'headers': {...}}
+ytdl_cache = {}
+ytdl_inflight = {}
+
+# One YoutubeDL instance per worker thread, kept warm between extractions
+ytdl_local = threading.local()
+
+# Prefer Opus so the audio can be passed through without re-encoding
+YTDL_OPTIONS = {
+    'format': 'bestaudio[acodec=opus]/bestaudio/best',
+    'noplaylist': True,
+    'quiet': True,
+    'no_warnings': True,
+    'skip_download': True,
+}
+
+# Reconnect options for signed media URLs, which drop long-running connections
+YTDL_BEFORE_OPTIONS = '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5'
+
+# Function to normalize station names, tags and search queries
+@functools.lru_cache(maxsize=4096)
+def normalize_search_text(text):
+    """
+    Casefolds, strips accents and replaces punctuation with spaces.
+    """
+    text = unicodedata.normalize('NFKD', text.casefold())
+    text = ''.join(char if char.isalnum() else ' ' for char in text if not unicodedata.combining(char))
+    return ' '.join(text.split())
+
+# Function to split a token into its trigrams
+def search_trigrams(token):
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class StationIndex:
+    """
+    In-memory search index over station names and tags: a prefix trie over the
+    normalized tokens plus a trigram index for infix and typo matches. The
+    select menu pages and !listradio pages are precomputed on build.
+    """
+
+    SELECT_PAGE_SIZE = 25
+    LIST_PAGE_SIZE = 10
+
+    def __init__(self):
+        self.build({}, {})
+
+    def build(self, stations, tags):
+        self.names = list(stations)
+        self.keys = []
+        self.trie = {}
+        self.trigrams = collections.defaultdict(list)
+        for station_id, name in enumerate(self.names):
+            name_key = normalize_search_text(name)
+            key = normalize_search_text(' '.join([name] + tags.get(name, [])))
+            self.keys.append(name_key)
+            # Every token plus the name without spaces ("rockantenne" finds "Rock Antenne")
+            tokens = set(key.split()) | {name_key.replace(' ', '')}
+            first_token = name_key.split(' ', 1)[0]
+            for token in tokens:
+                node = self.trie
+                for position, char in enumerate(token):
+                    node = node.setdefault(char, {})
+                    ids = node.setdefault('', [])
+                    if not ids or ids[-1] != station_id:
+                        ids.append(station_id)
+                    # '^' lists the stations whose name starts with this prefix
+                    if token == first_token:
+                        starts = node.setdefault('^', [])
+                        if not starts or starts[-1] != station_id:
+                            starts.append(station_id)
+                for trigram in search_trigrams(token):
+                    postings = self.trigrams[trigram]
+                    if not postings or postings[-1] != station_id:
+                        postings.append(station_id)
+        self.select_pages = self.build_select_pages(range(len(self.names)))
+        self.list_pages = [
+            list(range(start, min(start + self.LIST_PAGE_SIZE, len(self.names))))
+            for start in range(0, len(self.names), self.LIST_PAGE_SIZE)
+        ]
+
+    def build_select_pages(self, station_ids):
+        """
+        Splits the stations into pages of select options (Discord allows 25 per select).
+        """
+        options = [
+            discord.SelectOption(
+                label=f"🎵 {self.names[i]}"[:100],
+                value=str(i + 1),
+                description=f"Select to play {self.names[i]}"[:100]
+            )
+            for i in station_ids
+        ]
+        return [
+            options[start:start + self.SELECT_PAGE_SIZE]
+            for start in range(0, len(options), self.SELECT_PAGE_SIZE)
+        ]
+
+    def search(self, query, limit=25):
+        """
+        Returns the IDs (0-based) of the best matching stations: prefix matches on
+        all query tokens (names starting with the query ranked on top), or
+        trigram matches for infixes and typos if nothing matches by prefix.
+        """
+        query = normalize_search_text(query)
+        if not query:
+            return list(range(min(limit, len(self.names))))
+
+        nodes = []
+        for token in query.split():
+            node = self.trie
+            for char in token:
+                node = node.get(char)
+                if node is None:
+                    return self.fuzzy_search(query, limit)
+            nodes.append(node)
+
+        # Walk the shortest posting list and check the others, stopping at the limit.
+        # Membership sets are built lazily per node and kept for the next keystroke.
+        by_length = sorted(nodes, key=lambda node: len(node['']))
+        postings = [node[''] for node in by_length]
+        others = []
+        for node in by_length[1:]:
+            if '*' not in node:
+                node['*'] = set(node[''])
+            others.append(node['*'])
+        ranked = []
+        seen = set()
+        candidates = itertools.chain(
+            (i for i in nodes[0].get('^', ()) if self.keys[i].startswith(query)),
+            postings[0]
+        )
+        for station_id in candidates:
+            if station_id in seen or not all(station_id in ids for ids in others):
+                continue
+            seen.add(station_id)
+            ranked.append(station_id)
+            if len(ranked) >= limit:
+                break
+        return ranked or self.fuzzy_search(query, limit)
+
+    def fuzzy_search(self, query, limit):
+        """
+        Returns stations sharing most of the query's trigrams (infixes and typos).
+        """
+        # Score by shared trigrams, using only the rarest ones to keep lookups cheap
+        query_trigrams = search_trigrams(query.replace(' ', ''))
+        trigrams = sorted(
+            (self.trigrams[t] for t in query_trigrams if t in self.trigrams),
+            key=len
+        )[:8]
+        if not trigrams:
+            return []
+        scores = collections.Counter()
+        for ids in trigrams:
+            scores.update(ids)
+        required = max(1, (min(len(query_trigrams), 8) + 1) // 2)
+        return [station_id for station_id, score in scores.most_common(limit) if score >= required]
+
+# Search index over the configured stations (rebuilt by load_config)
+station_index = StationIndex()
+
+class CronSchedule:
+    """
+    Cron expression (minute hour day month weekday) with *, lists, ranges and
+    steps. Weekday 0 and 7 are Sunday; day and weekday combine like in cron.
+    """
+
+    FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"expected 5 cron fields, got '{expression}'")
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self.parse_field(part, low, high) for part, (low, high) in zip(parts, self.FIELDS)
+        )
+        if 7 in self.weekdays:
+            self.weekdays = self.weekdays | {0}
+        self.any_day = parts[2] == '*'
+        self.any_weekday = parts[4] == '*'
+
+    @staticmethod
+    def parse_field(field, low, high):
+        values = set()
+        for item in field.split(','):
+            item, _, step = item.partition('/')
+            if item == '*':
+                start, end = low, high
+            elif '-' in item:
+                start, end = map(int, item.split('-', 1))
+            else:
+                start = end = int(item)
+            if not low <= start <= end <= high:
+                raise ValueError(f"'{field}' is out of range {low}-{high}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return frozenset(values)
+
+    def matches_day(self, moment):
+        in_days = moment.day in self.days
+        in_weekdays = moment.isoweekday() % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def next_after(self, moment):
+        """
+        Returns the first matching minute after the given (local) datetime.
+        Skips whole months, days and hours that cannot match.
+        """
+        moment = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self.matches_day(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError("cron expression never matches")
+
+class ScheduleEntry:
+    """
+    One [schedule] line: "<cron expression> | <station number or name> [| <guild id>]".
+    Without a guild ID the entry applies to the guild of the default voice channel.
+    """
+
+    def __init__(self, name, value):
+        parts = [part.strip() for part in value.split('|')]
+        if len(parts) not in (2, 3) or not parts[1]:
+            raise ValueError("expected '<cron> | <station> [| <guild id>]'")
+        self.name = name
+        self.cron = CronSchedule(parts[0])
+        self.station = parts[1]
+        self.guild_id = int(parts[2]) if len(parts) == 3 and parts[2] else None
+
+    def next_fire(self, after):
+        """
+        Returns the unix timestamp of the next slot boundary after the timestamp.
+        """
+        return self.cron.next_after(datetime.fromtimestamp(after)).timestamp()
+
 # Function to load configuration settings
 def load_config():
     global token, channel_id, default_voice_channel_id, default_stream_url, default_volume_percentage
     global allowed_role_ids, client_id, radio_stations, BANNED_TITLES
+    global RESOLVER_CACHE_TTL, RESOLVER_PROBE_TIMEOUT
+    global HTTP_LIMIT, HTTP_LIMIT_PER_HOST, HTTP_DNS_CACHE_TTL, HTTP_KEEPALIVE_TIMEOUT, HTTP_TIMEOUT
+    global YTDL_HOSTS, YTDL_CACHE_TTL, YTDL_WORKERS
+    global STATE_FILE, RESTORE_CONCURRENCY
+    global IDLE_SUSPEND, IDLE_GRACE_SECONDS, PREBUFFER_FRAMES
+    global MAX_PROCESSES, MAX_METADATA_PROCESSES, METADATA_TIMEOUT
+    global SCHEDULE_ENTRIES, SCHEDULE_PREWARM_SECONDS
+    global TIMESHIFT_ENABLED, TIMESHIFT_DIRECTORY, TIMESHIFT_SECONDS, TIMESHIFT_BITRATE
+    global RELAY_ENABLED, RELAY_HOST, RELAY_PORT, RELAY_BURST_CHUNKS, RELAY_LISTENER_QUEUE, RELAY_METAINT
+    global PROFILE_TOKEN, PROFILE_MAX_SECONDS, PROFILE_SAMPLE_INTERVAL, SLOW_CALLBACK_MS
 
     try:
         token = config['settings']['token']
@@ -75,13 +423,20 @@ def load_config():
 
         # Load radio stations from config, handle possible KeyErrors
         radio_stations = {}
+        station_tags = {}
         for s in config.sections():
             if s.startswith('radio_stations'):
                 for i in range(1, len(config[s]) + 1):
                     name_key = f'station{i}_name'
                     url_key = f'station{i}_url'
+                    tags_key = f'station{i}_tags'
                     if name_key in config[s] and url_key in config[s]:
                         radio_stations[config[s][name_key]] = config[s][url_key]
+                        if tags_key in config[s]:
+                            station_tags[config[s][name_key]] = [
+                                tag.strip() for tag in config[s][tags_key].split(',') if tag.strip()
+                            ]
+        station_index.build(radio_stations, station_tags)
         
         # Load banned titles for push (Wildcard/Teilstring-Suche)
         if 'push' in config and 'banned_titles' in config['push']:
@@ -93,6 +448,76 @@ def load_config():
         else:
             BANNED_TITLES = []
 
+        # Stream resolver settings (optional section)
+        RESOLVER_CACHE_TTL = config.getint('resolver', 'cache_ttl', fallback=300)
+        RESOLVER_PROBE_TIMEOUT = config.getfloat('resolver', 'probe_timeout', fallback=5.0)
+        resolved_streams.clear()
+
+        # Shared HTTP client settings (optional section, applied when the client is created)
+        HTTP_LIMIT = config.getint('http', 'limit', fallback=100)
+        HTTP_LIMIT_PER_HOST = config.getint('http', 'limit_per_host', fallback=8)
+        HTTP_DNS_CACHE_TTL = config.getint('http', 'dns_cache_ttl', fallback=300)
+        HTTP_KEEPALIVE_TIMEOUT = config.getfloat('http', 'keepalive_timeout', fallback=30.0)
+        HTTP_TIMEOUT = config.getfloat('http', 'timeout', fallback=15.0)
+
+        # yt-dlp settings (optional section)
+        YTDL_HOSTS = [
+            host.strip().lower()
+            for host in config.get(
+                'ytdlp', 'hosts',
+                fallback='youtube.com,youtu.be,soundcloud.com,twitch.tv,mixcloud.com,vimeo.com'
+            ).split(',')
+            if host.strip()
+        ]
+        YTDL_CACHE_TTL = config.getint('ytdlp', 'cache_ttl', fallback=1800)
+        YTDL_WORKERS = config.getint('ytdlp', 'workers', fallback=2)
+
+        # Warm restart settings (optional section)
+        STATE_FILE = config.get('state', 'file', fallback='playback_state.json')
+        RESTORE_CONCURRENCY = config.getint('state', 'restore_concurrency', fallback=5)
+
+        # Scheduled programming (optional section)
+        SCHEDULE_PREWARM_SECONDS = config.getint('schedule', 'prewarm_seconds', fallback=5)
+        SCHEDULE_ENTRIES = []
+        if 'schedule' in config:
+            for name, value in config['schedule'].items():
+                if name == 'prewarm_seconds':
+                    continue
+                try:
+                    SCHEDULE_ENTRIES.append(ScheduleEntry(name, value))
+                except ValueError as e:
+                    logger.error(f"Ignoring schedule entry '{name}': {e}")
+
+        # ffmpeg process limits (optional section)
+        MAX_PROCESSES = config.getint('processes', 'max_processes', fallback=32)
+        MAX_METADATA_PROCESSES = config.getint('processes', 'max_metadata', fallback=4)
+        METADATA_TIMEOUT = config.getfloat('processes', 'metadata_timeout', fallback=15)
+
+        # Idle suspension settings (optional section)
+        IDLE_SUSPEND = config.getboolean('idle', 'enabled', fallback=True)
+        IDLE_GRACE_SECONDS = config.getint('idle', 'grace_seconds', fallback=120)
+        PREBUFFER_FRAMES = config.getint('idle', 'prebuffer_frames', fallback=25)
+
+        # Timeshift settings (optional section)
+        TIMESHIFT_ENABLED = config.getboolean('timeshift', 'enabled', fallback=True)
+        TIMESHIFT_DIRECTORY = config.get('timeshift', 'directory', fallback='timeshift')
+        TIMESHIFT_SECONDS = config.getint('timeshift', 'window_seconds', fallback=300)
+        TIMESHIFT_BITRATE = config.getint('timeshift', 'bitrate', fallback=128)
+
+        # Local HTTP relay settings (optional section)
+        RELAY_ENABLED = config.getboolean('relay', 'enabled', fallback=False)
+        RELAY_HOST = config.get('relay', 'host', fallback='127.0.0.1')
+        RELAY_PORT = config.getint('relay', 'port', fallback=8000)
+        RELAY_BURST_CHUNKS = config.getint('relay', 'burst_chunks', fallback=16)
+        RELAY_LISTENER_QUEUE = config.getint('relay', 'listener_queue', fallback=64)
+        RELAY_METAINT = config.getint('relay', 'metaint', fallback=16000)
+
+        # Profiling and slow-callback diagnostics (optional section)
+        PROFILE_TOKEN = config.get('profile', 'http_token', fallback='')
+        PROFILE_MAX_SECONDS = config.getint('profile', 'max_seconds', fallback=60)
+        PROFILE_SAMPLE_INTERVAL = config.getfloat('profile', 'sample_interval_ms', fallback=10) / 1000
+        SLOW_CALLBACK_MS = config.getint('profile', 'slow_callback_ms', fallback=100)
+
         logger.info("Configuration loaded successfully")
     except Exception as e:
         logger.error(f"Error loading configuration: {e}")
@@ -101,23 +526,791 @@ def load_config():
 # Load initial configuration
 load_config()
 
+# yt-dlp extraction is blocking, so it runs in its own worker threads
+ytdl_executor = ThreadPoolExecutor(max_workers=YTDL_WORKERS, thread_name_prefix='ytdl')
+
+# Function to extract stream URLs from a playlist body
+def parse_playlist(body, base_url):
+    """
+    Extracts the entries of a .pls or .m3u/.m3u8 playlist.
+    HLS playlists are left alone (returns an empty list) since ffmpeg plays them natively.
+    """
+    if '#EXT-X-' in body:
+        return []
+    entries = []
+    for line in body.splitlines():
+        line = line.strip()
+        if not line or line.startswith(('#', '[')):
+            continue
+        if '=' in line and not line.startswith(('http://', 'https://')):
+            # .pls: "File1=http://..." (Title1=/Length1= lines are ignored)
+            key, value = line.split('=', 1)
+            if not key.strip().lower().startswith('file'):
+                continue
+            line = value.strip()
+        entry = urljoin(base_url, line)
+        if entry.startswith(('http://', 'https://')) and entry not in entries:
+            entries.append(entry)
+    return entries
+
+# Function to build the trace hooks for the HTTP statistics
+def create_http_trace_config():
+    """
+    Returns a TraceConfig that records latency, errors, DNS lookups and new vs.
+    reused connections per host in http_stats.
+    """
+    trace_config = aiohttp.TraceConfig()
+
+    def count_request(context, host):
+        stats = http_stats[host]
+        stats['requests'] += 1
+        # Every redirect hop takes its own connection, so count them all
+        stats['new_connections'] += context.new_connections
+        stats['reused_connections'] += context.reused_connections
+        context.new_connections = context.reused_connections = 0
+        return stats
+
+    async def on_request_start(session, context, params):
+        context.start = time.monotonic()
+        context.new_connections = context.reused_connections = 0
+
+    async def on_request_end(session, context, params):
+        stats = count_request(context, params.url.host)
+        latency = time.monotonic() - context.start
+        stats['latency'] += latency
+        stats['max_latency'] = max(stats['max_latency'], latency)
+
+    async def on_request_exception(session, context, params):
+        count_request(context, params.url.host)['errors'] += 1
+
+    async def on_connection_create_end(session, context, params):
+        context.new_connections += 1
+
+    async def on_connection_reuseconn(session, context, params):
+        context.reused_connections += 1
+
+    async def on_dns_resolvehost_end(session, context, params):
+        http_stats[params.host]['dns_misses'] += 1
+
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+    return trace_config
+
+# Function to get the shared HTTP client
+def get_http_session():
+    """
+    Returns the process-wide ClientSession: one keep-alive connection pool with
+    a DNS cache, per-host connection limits and common timeouts.
+    Created on first use if on_ready has not done it yet.
+    """
+    global http_session
+    if http_session is None or http_session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_LIMIT,
+            limit_per_host=HTTP_LIMIT_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT
+        )
+        http_session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT, sock_connect=RESOLVER_PROBE_TIMEOUT),
+            trace_configs=[create_http_trace_config()]
+        )
+        logger.info(
+            f"HTTP client created (limit {HTTP_LIMIT}, {HTTP_LIMIT_PER_HOST} per host, "
+            f"DNS cache {HTTP_DNS_CACHE_TTL}s)"
+        )
+    return http_session
+
+# Function to close the shared HTTP client on shutdown
+async def close_http_session():
+    """
+    Closes the shared ClientSession and its pooled connections.
+    """
+    global http_session
+    if http_session is not None and not http_session.closed:
+        await http_session.close()
+        logger.info("HTTP client closed")
+    http_session = None
+
+# Function to follow redirects and expand playlist wrappers
+async def expand_stream_url(session, url, depth=0):
+    """
+    Follows the redirect chain of a station URL and expands playlist wrappers
+    into the list of candidate mirror URLs.
+    """
+    timeout = aiohttp.ClientTimeout(total=RESOLVER_PROBE_TIMEOUT)
+    async with session.get(url, allow_redirects=True, timeout=timeout) as response:
+        final_url = str(response.url)
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        is_playlist = (
+            content_type in PLAYLIST_CONTENT_TYPES
+            or response.url.path.lower().endswith(PLAYLIST_EXTENSIONS)
+        )
+        if not is_playlist:
+            return [final_url]
+        body = await response.content.read(65536)
+
+    entries = parse_playlist(body.decode(errors='ignore'), final_url)
+    if not entries:
+        return [final_url]
+
+    mirrors = []
+    for entry in entries:
+        if depth < 3 and entry.split('?')[0].lower().endswith(PLAYLIST_EXTENSIONS):
+            try:
+                nested = await expand_stream_url(session, entry, depth + 1)
+            except Exception as e:
+                logger.warning(f"Could not expand nested playlist {entry}: {e}")
+                continue
+        else:
+            nested = [entry]
+        for mirror in nested:
+            if mirror not in mirrors:
+                mirrors.append(mirror)
+    return mirrors or [final_url]
+
+# Function to measure the time-to-first-byte of a single mirror
+async def probe_mirror(session, url):
+    """
+    Opens the mirror and waits for the first chunk of audio.
+    Returns (mirror, ttfb, final_url) or (mirror, None, None) if the mirror is unreachable.
+    """
+    start = time.monotonic()
+    try:
+        timeout = aiohttp.ClientTimeout(total=RESOLVER_PROBE_TIMEOUT)
+        async with session.get(url, allow_redirects=True, timeout=timeout) as response:
+            if response.status >= 400:
+                logger.debug(f"Mirror {url} answered with status {response.status}")
+                return url, None, None
+            await response.content.readany()
+            return url, time.monotonic() - start, str(response.url)
+    except Exception as e:
+        logger.debug(f"Mirror {url} failed probe: {e}")
+        return url, None, None
+
+# Function to race all mirrors against each other
+async def rank_mirrors(session, mirrors):
+    """
+    Probes all mirrors concurrently and returns them ordered by time-to-first-byte.
+    Once the fastest mirror answered, the others get a short grace period; mirrors
+    still pending after that are ranked behind the measured ones, failed ones last.
+    """
+    if len(mirrors) == 1:
+        return mirrors
+
+    pending = {asyncio.create_task(probe_mirror(session, mirror)) for mirror in mirrors}
+    measured = []
+    failed = set()
+    deadline = time.monotonic() + RESOLVER_PROBE_TIMEOUT
+    try:
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                mirror, ttfb, final_url = task.result()
+                if ttfb is None:
+                    failed.add(mirror)
+                    continue
+                if not measured:
+                    deadline = min(deadline, time.monotonic() + 0.25)
+                measured.append((ttfb, mirror, final_url))
+    finally:
+        for task in pending:
+            task.cancel()
+
+    measured.sort()
+    ranked = [final_url for _, _, final_url in measured]
+    measured_mirrors = {mirror for _, mirror, _ in measured}
+    ranked += [m for m in mirrors if m not in measured_mirrors and m not in failed]
+    ranked += [m for m in mirrors if m in failed]
+    if measured:
+        logger.info(f"Fastest mirror {ranked[0]} ({measured[0][0] * 1000:.0f} ms to first byte)")
+    return [m for i, m in enumerate(ranked) if m not in ranked[:i]]
+
+# Function to resolve a station URL into its ranked mirrors
+async def resolve_mirrors(url):
+    """
+    Expands playlists/redirects for the station URL once, races the mirrors
+    and stores the result in the resolver cache.
+    """
+    try:
+        session = get_http_session()
+        mirrors = await expand_stream_url(session, url)
+        mirrors = await rank_mirrors(session, mirrors)
+    except Exception as e:
+        logger.warning(f"Could not resolve stream URL {url}, using it as-is: {e}")
+        mirrors = [url]
+    resolved_streams[url] = {
+        'expires': time.monotonic() + RESOLVER_CACHE_TTL,
+        'mirrors': mirrors
+    }
+    logger.debug(f"Resolved {url} -> {mirrors}")
+    return mirrors
+
+# Function to get the stream URL ffmpeg should open for a station
+async def resolve_stream_url(url):
+    """
+    Returns the currently preferred mirror for the station URL, resolving it
+    only when the cache entry is missing or expired.
+    """
+    entry = resolved_streams.get(url)
+    if entry and entry['mirrors'] and entry['expires'] > time.monotonic():
+        return entry['mirrors'][0]
+
+    # Share one resolution between concurrent callers (playback start and metadata poll)
+    task = resolve_inflight.get(url)
+    if task is None:
+        task = asyncio.ensure_future(resolve_mirrors(url))
+        resolve_inflight[url] = task
+        task.add_done_callback(lambda _: resolve_inflight.pop(url, None))
+    mirrors = await asyncio.shield(task)
+    return mirrors[0]
+
+# Function to fall back to the next mirror after a failure
+def mark_stream_failed(url):
+    """
+    Moves the current mirror of the station to the end of the list so the next
+    playback start uses the next mirror without resolving again.
+    """
+    entry = resolved_streams.get(url)
+    if not entry:
+        return
+    mirrors = entry['mirrors']
+    if len(mirrors) > 1:
+        mirrors.append(mirrors.pop(0))
+        logger.info(f"Mirror failed for {url}, falling back to {mirrors[0]}")
+    else:
+        # Nothing to fall back to, resolve the redirect chain again next time
+        resolved_streams.pop(url, None)
+    ytdl_cache.pop(url, None)
+
+# Function to stop playback on purpose
+def stop_playback(voice_client):
+    """
+    Stops the voice client and remembers that the stop was requested, so the
+    after-callback does not count it as a failed mirror.
+    """
+    if voice_client.is_playing() or voice_client.is_paused():
+        requested_stops.add(voice_client.guild.id)
+        voice_client.stop()
+
+# Function to check whether a URL has to go through yt-dlp
+def needs_extraction(url):
+    """
+    Returns True for page URLs (YouTube, SoundCloud, ...) that ffmpeg cannot play directly.
+    """
+    host = (urlparse(url).hostname or '').lower()
+    return any(host == h or host.endswith('.' + h) for h in YTDL_HOSTS)
+
+# Function to read the expiry out of a signed media URL
+def media_url_expiry(media_url):
+    """
+    Returns the expiry (unix timestamp) embedded in a signed media URL, or None.
+    """
+    parsed = urlparse(media_url)
+    query = parse_qs(parsed.query)
+    for key in ('expire', 'Expires', 'exp'):
+        value = query.get(key, [''])[0]
+        if value.isdigit():
+            return int(value)
+    match = re.search(r'/expire/(\d+)', parsed.path)
+    return int(match.group(1)) if match else None
+
+# Function that runs the yt-dlp extraction (called in a worker thread)
+def extract_media(url):
+    """
+    Extracts the best audio-only format for the page URL.
+    Each worker thread keeps its YoutubeDL instance, so extractors stay initialized.
+    """
+    ydl = getattr(ytdl_local, 'ydl', None)
+    if ydl is None:
+        import yt_dlp
+        ydl = ytdl_local.ydl = yt_dlp.YoutubeDL(YTDL_OPTIONS)
+    info = ydl.extract_info(url, download=False)
+    if info.get('entries'):
+        info = next(entry for entry in info['entries'] if entry)
+    return {
+        'url': info['url'],
+        'acodec': (info.get('acodec') or '').lower(),
+        'title': info.get('title') or 'Unknown Title',
+        'headers': info.get('http_headers') or {}
+    }
+
+# Function to resolve a page URL through yt-dlp
+async def resolve_media(url):
+    """
+    Returns the extracted media info for the page URL, cached until the
+    signed media URL expires.
+    """
+    entry = ytdl_cache.get(url)
+    if entry and entry['expires'] > time.time():
+        return entry
+
+    task = ytdl_inflight.get(url)
+    if task is None:
+        loop = asyncio.get_running_loop()
+        task = loop.run_in_executor(ytdl_executor, extract_media, url)
+        ytdl_inflight[url] = task
+        task.add_done_callback(lambda _: ytdl_inflight.pop(url, None))
+    media = await asyncio.shield(task)
+
+    expiry = media_url_expiry(media['url'])
+    # Renew a minute early so ffmpeg never starts on an URL that is about to expire
+    media['expires'] = expiry - 60 if expiry else time.time() + YTDL_CACHE_TTL
+    ytdl_cache[url] = media
+    logger.info(f"Resolved {url} via yt-dlp ({media['acodec'] or 'unknown codec'}): {media['title']}")
+    return media
+
+# ffmpeg prints the ICY/stream title on stderr
+STREAM_TITLE_RE = re.compile(r'Title\s*:\s*(.*)')
+
+class ProcessSupervisor:
+    """
+    Owns every ffmpeg child process. Metadata probes run through run() with a
+    concurrency cap and a hard deadline (killed and reaped on timeout); playback
+    processes spawned by discord.py are adopted so they count against the
+    global cap. CPU, RSS and lifetime of every child are tracked via psutil.
+    """
+
+    def __init__(self, max_processes, max_metadata):
+        self.max_processes = max_processes
+        self.metadata_slots = asyncio.Semaphore(max_metadata)
+        self.children = {}
+        self.timeouts = 0
+
+    def register(self, pid, kind, label, handle):
+        import psutil
+        try:
+            process = psutil.Process(pid)
+            process.cpu_percent(None)  # first call only sets the baseline
+        except psutil.Error:
+            process = None
+        self.children[pid] = {
+            'kind': kind, 'label': label, 'started': time.time(), 'process': process, 'handle': handle
+        }
+
+    def unregister(self, pid):
+        self.children.pop(pid, None)
+
+    def prune(self):
+        """
+        Drops children whose owner (asyncio or discord.py) has already waited for
+        them. Only looks at the owners' return codes, no system calls.
+        """
+        for pid, child in list(self.children.items()):
+            if child['handle'].returncode is not None:
+                self.unregister(pid)
+
+    def ensure_capacity(self):
+        """
+        Raises if starting another ffmpeg process would exceed the global cap.
+        """
+        self.prune()
+        if len(self.children) >= self.max_processes:
+            raise RuntimeError(f"Too many ffmpeg processes running ({len(self.children)}/{self.max_processes})")
+
+    async def run(self, args, label, timeout, until=None):
+        """
+        Runs a short-lived child and returns its stderr. Stops the child as soon
+        as a stderr line matches `until`, kills it when the deadline passes.
+        """
+        async with self.metadata_slots:
+            self.ensure_capacity()
+            process = await asyncio.create_subprocess_exec(
+                *args,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE
+            )
+            self.register(process.pid, 'metadata', label, process)
+            output = []
+
+            async def read_stderr():
+                async for line in process.stderr:
+                    line = line.decode(errors='ignore')
+                    output.append(line)
+                    if until and until.search(line):
+                        return
+
+            try:
+                await asyncio.wait_for(read_stderr(), timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                logger.warning(f"ffmpeg ({label}) exceeded its {timeout}s deadline, killing it")
+            finally:
+                if process.returncode is None:
+                    process.kill()
+                await process.wait()
+                self.unregister(process.pid)
+            return ''.join(output)
+
+    def adopt(self, player, label):
+        """
+        Registers the ffmpeg process behind a (wrapped) discord.py audio source.
+        """
+        source = player
+        while source is not None and getattr(source, '_process', None) is None:
+            source = getattr(source, 'source', None)
+        if source is not None:
+            self.register(source._process.pid, 'playback', label, source._process)
+
+    def reap(self):
+        """
+        Reaps zombie children and drops exited ones from the table. Zombies are
+        reaped through their owner's Popen handle (poll()), so discord.py still
+        gets the exit status; asyncio's child watcher reaps its own processes.
+        Zombies the supervisor does not know are only reported.
+        """
+        import psutil
+        unknown = []
+        for process in psutil.Process().children():
+            try:
+                if process.status() != psutil.STATUS_ZOMBIE:
+                    continue
+            except psutil.Error:
+                continue
+            child = self.children.get(process.pid)
+            if child is None:
+                unknown.append(process.pid)
+            elif hasattr(child['handle'], 'poll'):
+                child['handle'].poll()
+                logger.info(f"Reaped zombie ffmpeg process {process.pid} ({child['label']})")
+        if unknown:
+            logger.warning(f"Zombie child processes not owned by the supervisor: {unknown}")
+
+        self.prune()
+        for pid, child in list(self.children.items()):
+            process = child['process']
+            try:
+                alive = process is not None and process.is_running() and process.status() != psutil.STATUS_ZOMBIE
+            except psutil.Error:
+                alive = False
+            if not alive:
+                self.unregister(pid)
+
+    def snapshot(self):
+        """
+        Returns (pid, kind, label, cpu %, RSS in MiB, lifetime in s) for every live child.
+        """
+        import psutil
+        self.prune()
+        rows = []
+        now = time.time()
+        for pid, child in self.children.items():
+            cpu, rss = 0.0, 0.0
+            try:
+                if child['process']:
+                    cpu = child['process'].cpu_percent(None)
+                    rss = child['process'].memory_info().rss / 1024 / 1024
+            except psutil.Error:
+                pass
+            rows.append((pid, child['kind'], child['label'], cpu, rss, now - child['started']))
+        return rows
+
+# Every ffmpeg child process goes through the supervisor
+process_supervisor = ProcessSupervisor(MAX_PROCESSES, MAX_METADATA_PROCESSES)
+
+# Function to create the audio source for a station
+async def create_player(url):
+    """
+    Returns an FFmpeg audio source for the station URL. Page URLs are resolved
+    through yt-dlp (Opus is passed through as-is), everything else plays the
+    preferred mirror of the station.
+    """
+    process_supervisor.ensure_capacity()
+    if needs_extraction(url):
+        media = await resolve_media(url)
+        before_options = YTDL_BEFORE_OPTIONS
+        if media['headers']:
+            headers = ''.join(f"{key}: {value}\r\n" for key, value in media['headers'].items())
+            before_options += f" -headers {shlex.quote(headers)}"
+        if media['acodec'] == 'opus':
+            player = discord.FFmpegOpusAudio(media['url'], codec='copy', before_options=before_options, **ffmpeg_options)
+        elif TIMESHIFT_ENABLED:
+            player = discord.FFmpegOpusAudio(media['url'], bitrate=TIMESHIFT_BITRATE, before_options=before_options, **ffmpeg_options)
+        else:
+            player = discord.FFmpegPCMAudio(media['url'], before_options=before_options, **ffmpeg_options)
+    else:
+        stream_url = await resolve_stream_url(url)
+        if TIMESHIFT_ENABLED:
+            player = discord.FFmpegOpusAudio(stream_url, bitrate=TIMESHIFT_BITRATE, **ffmpeg_options)
+        else:
+            player = discord.FFmpegPCMAudio(stream_url, **ffmpeg_options)
+
+    process_supervisor.adopt(player, url)
+
+    # Timeshift needs encoded Opus frames, which ffmpeg produces for us
+    if TIMESHIFT_ENABLED:
+        player = TimeshiftSource(player, get_timeshift_buffer(url))
+    return player
+
+class PrebufferedAudio(discord.AudioSource):
+    """
+    Wraps an audio source and reads its first frames ahead of time, so playback
+    starts with audio already buffered instead of waiting for the upstream.
+    """
+
+    def __init__(self, source, frames=None):
+        self.source = source
+        self.frames = PREBUFFER_FRAMES if frames is None else frames
+        self.buffer = collections.deque()
+        self.closed = False
+
+    def prefill(self):
+        # Blocking, run it in an executor
+        while len(self.buffer) < self.frames:
+            data = self.source.read()
+            if not data:
+                break
+            self.buffer.append(data)
+
+    def read(self):
+        if self.buffer:
+            return self.buffer.popleft()
+        return self.source.read()
+
+    def is_opus(self):
+        return self.source.is_opus()
+
+    @property
+    def _current_error(self):
+        # discord.py's AudioPlayer only asks the outer source for the ffmpeg error
+        return getattr(self.source, '_current_error', None)
+
+    def cleanup(self):
+        # discord.py calls cleanup() after playback and again from __del__
+        if self.closed:
+            return
+        self.closed = True
+        self.buffer.clear()
+        self.source.cleanup()
+
+class TimeshiftBuffer:
+    """
+    Ring of already-encoded Opus frames for one station, stored in a fixed-size
+    memory-mapped file. The index keeps the absolute byte position and length of
+    every frame in the window; frames are 20 ms, so frame number <-> time is a
+    multiplication. Resident memory stays flat regardless of the window length.
+    """
+
+    def __init__(self, url, seconds):
+        os.makedirs(TIMESHIFT_DIRECTORY, exist_ok=True)
+        self.url = url
+        self.path = os.path.join(TIMESHIFT_DIRECTORY, hashlib.sha1(url.encode()).hexdigest()[:16] + '.ring')
+        self.slots = seconds * 50
+        # Room for the window at the target bitrate plus headroom for VBR peaks
+        self.size = seconds * TIMESHIFT_BITRATE * 1000 // 8 * 5 // 4
+        with open(self.path, 'w+b') as f:
+            f.truncate(self.size)
+            self.map = mmap.mmap(f.fileno(), self.size)
+        self.positions = array('Q', bytes(8 * self.slots))
+        self.lengths = array('H', bytes(2 * self.slots))
+        self.count = 0
+        self.write_pos = 0
+        self.writer = None
+        self.refs = 0
+        # Frames are written and read on the audio player threads, the map is closed on the event loop
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def append(self, frame):
+        """
+        Stores the frame and returns its frame number.
+        """
+        length = len(frame)
+        start = self.write_pos % self.size
+        first = min(length, self.size - start)
+        with self.lock:
+            if self.closed:
+                return self.count - 1
+            self.map[start:start + first] = frame[:first]
+            if first < length:
+                self.map[0:length - first] = frame[first:]
+        slot = self.count % self.slots
+        self.positions[slot] = self.write_pos
+        self.lengths[slot] = length
+        self.write_pos += length
+        self.count += 1
+        return self.count - 1
+
+    def oldest(self):
+        """
+        Returns the number of the oldest frame that has not been overwritten.
+        """
+        low, high = max(0, self.count - self.slots), self.count
+        limit = self.write_pos - self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self.positions[middle % self.slots] < limit:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def read(self, number):
+        """
+        Returns the frame with the given number, or None if it left the window.
+        """
+        if number < self.oldest() or number >= self.count:
+            return None
+        slot = number % self.slots
+        length = self.lengths[slot]
+        start = self.positions[slot] % self.size
+        first = min(length, self.size - start)
+        with self.lock:
+            if self.closed:
+                return None
+            frame = self.map[start:start + first]
+            if first < length:
+                frame += self.map[0:length - first]
+        return frame
+
+    def available_seconds(self):
+        return (self.count - self.oldest()) // 50
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.map.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+# Function to get (or create) the timeshift buffer of a station
+def get_timeshift_buffer(url):
+    """
+    Returns the timeshift buffer of the station, creating its ring file on first use.
+    """
+    buffer = timeshift_buffers.get(url)
+    if buffer is None:
+        buffer = timeshift_buffers[url] = TimeshiftBuffer(url, TIMESHIFT_SECONDS)
+        logger.info(f"Timeshift buffer for {url}: {TIMESHIFT_SECONDS}s, {buffer.size // 1024} KiB")
+    return buffer
+
+# Function to release a timeshift buffer nobody plays anymore
+def release_timeshift_buffer(buffer):
+    """
+    Closes and deletes the ring file once no audio source uses the buffer.
+    """
+    if buffer.refs <= 0 and timeshift_buffers.get(buffer.url) is buffer:
+        del timeshift_buffers[buffer.url]
+        buffer.close()
+        logger.info(f"Timeshift buffer for {buffer.url} released")
+
+class TimeshiftSource(discord.AudioSource):
+    """
+    Plays an Opus source while recording it into the station's timeshift buffer.
+    The live source keeps being read in real time, so recording never stops;
+    with a delay set, the frame from that many seconds ago is played instead.
+    Only one source per station writes, the others just read.
+    """
+
+    def __init__(self, source, buffer):
+        self.source = source
+        self.buffer = buffer
+        self.delay = 0
+        self.closed = False
+        buffer.refs += 1
+
+    def seek(self, seconds):
+        """
+        Plays the given number of seconds behind live (0 = live). Returns the
+        delay actually applied, limited by what the buffer holds.
+        """
+        seconds = max(0, min(seconds, self.buffer.available_seconds()))
+        self.delay = seconds * 50
+        return seconds
+
+    def read(self):
+        data = self.source.read()
+        if not data:
+            return b''
+        if self.buffer.writer is None:
+            self.buffer.writer = self
+        if self.buffer.writer is self:
+            number = self.buffer.append(data)
+        else:
+            number = self.buffer.count - 1
+        if not self.delay or number < 0:
+            return data
+        frame = self.buffer.read(number - self.delay)
+        if frame is None:
+            # The delayed frame left the window, keep playing from the oldest one
+            oldest = self.buffer.oldest()
+            self.delay = number - oldest
+            frame = self.buffer.read(oldest) or data
+        return frame
+
+    def is_opus(self):
+        return True
+
+    @property
+    def _current_error(self):
+        # discord.py's AudioPlayer only asks the outer source for the ffmpeg error
+        return getattr(self.source, '_current_error', None)
+
+    def cleanup(self):
+        # discord.py calls cleanup() after playback and again from __del__,
+        # the reference must only be dropped once
+        if self.closed:
+            return
+        self.closed = True
+        self.source.cleanup()
+        if self.buffer.writer is self:
+            self.buffer.writer = None
+        self.buffer.refs -= 1
+        # Called from the audio player thread (or the GC), release the buffer on the
+        # event loop unless it is already shut down
+        try:
+            if bot.loop.is_running():
+                bot.loop.call_soon_threadsafe(release_timeshift_buffer, self.buffer)
+        except (AttributeError, RuntimeError):
+            pass
+
+# Function to find the timeshift source behind a voice client's audio source
+def find_timeshift_source(source):
+    """
+    Unwraps (pre-buffered) audio sources until the TimeshiftSource is found.
+    """
+    while source is not None and not isinstance(source, TimeshiftSource):
+        source = getattr(source, 'source', None)
+    return source
+
+# Function to create an audio source with its first frames already buffered
+async def create_prebuffered_player(url):
+    """
+    Creates the audio source for the station and pre-reads its first frames
+    off the event loop.
+    """
+    player = PrebufferedAudio(await create_player(url))
+    await asyncio.get_running_loop().run_in_executor(None, player.prefill)
+    return player
+
 # Function to fetch the stream title via ffmpeg
 async def get_stream_title(url):
     """
-    Returns the current stream title using ffmpeg.
+    Returns the current stream title using ffmpeg (or yt-dlp for page URLs).
     """
     try:
-        process = await asyncio.create_subprocess_exec(
-            'ffmpeg', 
-            '-re',
-            '-i', url, 
-            '-f', 'ffmetadata', 
-            '-', 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.PIPE
+        if needs_extraction(url):
+            return (await resolve_media(url))['title']
+        stream_url = await resolve_stream_url(url)
+        stderr = await process_supervisor.run(
+            ['ffmpeg', '-re', '-i', stream_url, '-f', 'ffmetadata', '-'],
+            label=url,
+            timeout=METADATA_TIMEOUT,
+            until=STREAM_TITLE_RE
         )
-        _, stderr = await process.communicate()
-        match = re.search(r'Title\s*:\s*(.*)', stderr.decode())
+        match = STREAM_TITLE_RE.search(stderr)
         title = match.group(1).strip() if match else 'Unknown Title'
         logger.debug(f"Stream title fetched: {title}")
         return title
@@ -153,33 +1346,85 @@ async def nickname_change(guild, station_name, bot_user):
         else:
             logger.error(f"Failed to change bot nickname: {e}")
 
+# Function to parse a stream title into its track identity
+@functools.lru_cache(maxsize=512)
+def track_identity(title):
+    """
+    Parses "Artist - Title", strips decoration such as "(Radio Edit)" or "feat. X"
+    and returns (canonical key, cleaned "artist title" for searches).
+    Re-announcements with different casing, spacing or suffixes share one key.
+    """
+    artist, name = split_track_title(title)
+    artists = sorted(
+        normalize_search_text(a) for a in TRACK_ARTIST_SPLIT_RE.split(artist) if normalize_search_text(a)
+    )
+    key = f"{' '.join(artists)}|{normalize_search_text(name)}"
+    return key, f"{artist} {name}".strip()
+
+# Function to split a stream title into artist and title
+def split_track_title(title):
+    """
+    Splits "Artist - Title" and strips decoration and featured artists.
+    Titles without separator have no artist.
+    """
+    parts = TRACK_SEPARATOR_RE.split(title.strip(), maxsplit=1)
+    artist, name = (parts[0], parts[1]) if len(parts) == 2 else ('', parts[0])
+    name = TRACK_FEATURING_RE.sub('', TRACK_DECORATION_RE.sub('', name)).strip() or name
+    artist = TRACK_FEATURING_RE.sub('', artist).strip()
+    return artist, name
+
+# Function to get the canonical key of a stream title
+def track_key(title):
+    return track_identity(title)[0] if title else ''
+
 # Function to fetch album cover image URL from Spotify API for a given track title
 async def fetch_cover_image_url(title):
     """
     Fetches album cover image URL from Spotify API for a given track title.
+    Results are cached per canonical track key.
     """
+    key, query = track_identity(title)
+    if key in cover_cache:
+        cover_cache.move_to_end(key)
+        logger.debug(f"Cover cache hit for track: {title}")
+        return cover_cache[key]
+
+    cover_url = await search_cover_image_url(query)
+    if cover_url is not None:
+        cover_cache[key] = cover_url
+        if len(cover_cache) > COVER_CACHE_SIZE:
+            cover_cache.popitem(last=False)
+    return cover_url or 'default_cover_url'
+
+# Function to search the cover on Spotify
+async def search_cover_image_url(title):
+    """
+    Searches Spotify for the track. Returns the cover URL, 'default_cover_url'
+    if Spotify has none, or None if the lookup itself failed (not cached).
+    """
+    import base64
     try:
         config = configparser.ConfigParser()
         config.read('config.ini')
         client_id = config.get('spotify', 'client_id')
         client_secret = config.get('spotify', 'client_secret')
-        async with aiohttp.ClientSession() as session:
-            credentials = base64.b64encode(f"{client_id}:{client_secret}".encode()).decode()
-            auth_response = await session.post(
-                'https://accounts.spotify.com/api/token',
-                data={'grant_type': 'client_credentials'},
-                headers={'Authorization': f'Basic {credentials}'}
-            )
+        session = get_http_session()
+        credentials = base64.b64encode(f"{client_id}:{client_secret}".encode()).decode()
+        async with session.post(
+            'https://accounts.spotify.com/api/token',
+            data={'grant_type': 'client_credentials'},
+            headers={'Authorization': f'Basic {credentials}'}
+        ) as auth_response:
             if auth_response.status != 200:
                 logger.error(f"Failed to get Spotify access token. Status: {auth_response.status}")
-                return 'default_cover_url'
+                return None
             auth_data = await auth_response.json()
-            access_token = auth_data['access_token']
-            search_response = await session.get(
-                f"https://api.spotify.com/v1/search",
-                params={'q': title, 'type': 'track', 'limit': 1},
-                headers={'Authorization': f'Bearer {access_token}'}
-            )
+        access_token = auth_data['access_token']
+        async with session.get(
+            f"https://api.spotify.com/v1/search",
+            params={'q': title, 'type': 'track', 'limit': 1},
+            headers={'Authorization': f'Bearer {access_token}'}
+        ) as search_response:
             if search_response.status == 200:
                 data = await search_response.json()
                 if data['tracks']['items']:
@@ -192,30 +1437,41 @@ async def fetch_cover_image_url(title):
                 return 'default_cover_url'
             else:
                 logger.error(f"Spotify API search failed. Status: {search_response.status}")
-                return 'default_cover_url'
+                return None
     except Exception as e:
         logger.error(f"Error fetching cover image: {e}")
-        return 'default_cover_url'
+        return None
 
 # Function to check if the stream has stopped and restart it
-async def check_and_restart_stream(guild, url):
+async def check_and_restart_stream(guild, url, error=None):
     """
     Checks whether the stream is still playing, and restarts it if necessary.
+    The mirror only counts as failed if playback raised an error or ended
+    without being stopped on purpose.
     """
+    requested = guild.id in requested_stops
+    requested_stops.discard(guild.id)
     try:
         if not guild.voice_client:
             logger.warning(f"No voice client available in {guild.name}")
             return
+        if guild.id in suspended_guilds:
+            logger.debug(f"Stream suspended in {guild.name}, not restarting")
+            return
+        entry = guild_playback.get(guild.id)
+        if entry and entry['url'] != url:
+            logger.debug(f"Ignoring restart of replaced stream {url} in {guild.name}")
+            return
         if not guild.voice_client.is_playing():
             logger.info(f"Stream stopped. Attempting to restart in {guild.name}")
+            if error or not requested:
+                mark_stream_failed(url)
             try:
-                if guild.voice_client.is_playing():
-                    guild.voice_client.stop()
                 await asyncio.sleep(1)
-                player = discord.FFmpegPCMAudio(url, **ffmpeg_options)
+                player = await create_player(url)
                 guild.voice_client.play(
                     player, 
-                    after=lambda e: bot.loop.create_task(check_and_restart_stream(guild, url)) if e else None
+                    after=lambda e: bot.loop.create_task(check_and_restart_stream(guild, url, e))
                 )
                 logger.info(f"Stream restarted successfully in {guild.name}")
             except Exception as restart_error:
@@ -223,6 +1479,296 @@ async def check_and_restart_stream(guild, url):
     except Exception as e:
         logger.error(f"Unexpected error in stream check for {guild.name}: {e}")
 
+# Function to get the seconds since the process was started
+def seconds_since_process_start(timestamp=None):
+    """
+    Returns the seconds between process start (including interpreter startup)
+    and the timestamp (default: now).
+    """
+    import psutil
+    return (timestamp or time.time()) - psutil.Process().create_time()
+
+# Function to record a startup stage
+def mark_startup(stage):
+    """
+    Records the first time the given startup stage is reached.
+    """
+    startup_timeline.setdefault(stage, time.time())
+
+# Function to log the startup timeline
+def log_startup_timeline():
+    """
+    Logs every recorded startup stage relative to the process start, in one
+    line, so cold-start time can be compared between deployments.
+    """
+    stages = sorted(startup_timeline.items(), key=lambda item: item[1])
+    timeline = ', '.join(f"{stage} {seconds_since_process_start(timestamp):.2f}s" for stage, timestamp in stages)
+    logger.info(f"Startup timeline (since process start): {timeline}")
+
+# Function to write the playback state file atomically
+def write_playback_state(data):
+    """
+    Writes the snapshot to a temporary file and swaps it in, so a crash never
+    leaves a half-written state file behind.
+    """
+    tmp_file = f"{STATE_FILE}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, STATE_FILE)
+
+# Function to snapshot the playback state (debounced)
+async def save_playback_state():
+    """
+    Persists the per-guild playback state. Changes arriving within a second are
+    coalesced into a single write.
+    """
+    global playback_state_save
+    try:
+        await asyncio.sleep(1)
+        playback_state_save = None
+        data = json.dumps(
+            {str(guild_id): entry for guild_id, entry in guild_playback.items()},
+            separators=(',', ':'),
+            ensure_ascii=False
+        )
+        await asyncio.get_running_loop().run_in_executor(None, write_playback_state, data)
+        logger.debug(f"Playback state saved for {len(guild_playback)} guild(s)")
+    except Exception as e:
+        playback_state_save = None
+        logger.error(f"Error saving playback state: {e}")
+
+# Function to update the playback state of a guild
+def update_playback_state(guild, channel=None, url=None, title=None):
+    """
+    Records the voice channel, station URL and/or last title of a guild and
+    schedules a snapshot if anything changed.
+    """
+    global playback_state_save
+    if url is not None:
+        # Passing the URL means playback (re)starts, so the guild is no longer suspended;
+        # re-arm the idle timer in case it starts in an empty channel (!play, !fix, auto_fix)
+        suspended_guilds.discard(guild.id)
+        evaluate_idle(guild)
+    entry = guild_playback.setdefault(guild.id, {'channel_id': None, 'url': None, 'title': None})
+    changes = {'channel_id': channel.id if channel else None, 'url': url, 'title': title}
+    changed = False
+    for key, value in changes.items():
+        if value is not None and entry[key] != value:
+            entry[key] = value
+            changed = True
+    if changed and playback_state_save is None:
+        playback_state_save = bot.loop.create_task(save_playback_state())
+
+# Function to forget the playback state of a guild
+def clear_playback_state(guild):
+    """
+    Removes the guild from the playback state (e.g. after !leave).
+    """
+    global playback_state_save
+    if guild_playback.pop(guild.id, None) and playback_state_save is None:
+        playback_state_save = bot.loop.create_task(save_playback_state())
+
+# Function to load the playback state from disk
+def load_playback_state():
+    """
+    Returns the saved per-guild playback state, or an empty dict.
+    """
+    try:
+        with open(STATE_FILE, encoding='utf-8') as f:
+            return {int(guild_id): entry for guild_id, entry in json.load(f).items()}
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.error(f"Error loading playback state: {e}")
+        return {}
+
+# Function to reconnect and start playback in a single guild
+async def restore_guild(channel, entry, semaphore):
+    """
+    Connects to the saved voice channel, starts the saved station and updates
+    the nickname. Records the time from process start to audio.
+    """
+    guild = channel.guild
+    url = entry['url']
+    async with semaphore:
+        try:
+            voice_client = guild.voice_client
+            if not voice_client:
+                voice_client = await channel.connect()
+                logger.info(f"Connected to voice channel: {channel.name} ({guild.name})")
+            elif voice_client.channel != channel:
+                await voice_client.move_to(channel)
+            update_playback_state(guild, channel=channel, url=url)
+            if entry.get('title'):
+                station_titles.setdefault(url, entry['title'])
+
+            station_name = next((name for name, u in radio_stations.items() if u == url), "Custom URL")
+            if voice_client.is_playing():
+                logger.info(f"{station_name} already playing in: {channel.name}")
+            else:
+                player = await create_player(url)
+                voice_client.play(
+                    player,
+                    after=lambda e: bot.loop.create_task(check_and_restart_stream(guild, url, e))
+                )
+                restore_metrics[guild.id] = seconds_since_process_start()
+                mark_startup('first_audio')
+                logger.info(f"Playing {station_name} in {channel.name} ({guild.name}), "
+                            f"{restore_metrics[guild.id]:.2f}s after process start")
+            await nickname_change(guild, station_name, bot.user)
+        except Exception as e:
+            logger.error(f"Error restoring playback in {guild.name}: {e}")
+
+# Function to restore playback in all previously active guilds
+async def restore_playback_state():
+    """
+    Restores the saved playback state of all guilds concurrently (bounded by
+    restore_concurrency). Falls back to the default channel and station.
+    """
+    global current_stream_url, last_posted_title
+    state = load_playback_state()
+
+    default_channel = bot.get_channel(default_voice_channel_id)
+    if default_channel and default_channel.guild.id not in state:
+        state[default_channel.guild.id] = {
+            'channel_id': default_voice_channel_id,
+            'url': default_stream_url,
+            'title': None
+        }
+
+    semaphore = asyncio.Semaphore(RESTORE_CONCURRENCY)
+    restores = []
+    for guild_id, entry in state.items():
+        channel = bot.get_channel(entry.get('channel_id') or 0)
+        if not channel or not entry.get('url'):
+            logger.warning(f"Cannot restore playback for guild {guild_id}: channel or station missing")
+            continue
+        restores.append(restore_guild(channel, entry, semaphore))
+
+    # The now-playing push follows the default guild's station
+    default_entry = state.get(default_channel.guild.id) if default_channel else None
+    if default_entry:
+        current_stream_url = default_entry['url']
+        last_posted_title = default_entry.get('title') or last_posted_title
+
+    # Guilds without playback only need their nickname set
+    station_name = next((name for name, url in radio_stations.items() if url == current_stream_url), "Unknown Station")
+    restored_guild_ids = set(state)
+    renames = [
+        nickname_change(guild, station_name, bot.user)
+        for guild in bot.guilds
+        if guild.id not in restored_guild_ids
+    ]
+
+    async def bounded(coro):
+        async with semaphore:
+            await coro
+
+    await asyncio.gather(*restores, *(bounded(rename) for rename in renames))
+    if restore_metrics:
+        logger.info(f"Audio restored in {len(restore_metrics)} guild(s), "
+                    f"slowest after {max(restore_metrics.values()):.2f}s from process start")
+
+# Function to (re)build the voice occupancy from the member cache
+def rebuild_voice_occupancy():
+    """
+    Initializes the occupancy tracker once; afterwards it is kept up to date
+    incrementally by on_voice_state_update.
+    """
+    voice_occupancy.clear()
+    for guild in bot.guilds:
+        for channel in guild.voice_channels + guild.stage_channels:
+            humans = {member.id for member in channel.members if not member.bot}
+            if humans:
+                voice_occupancy[channel.id] = humans
+
+# Function to get the number of listeners in a voice channel
+def listener_count(channel):
+    """
+    Returns the number of non-bot members in the voice channel (O(1)).
+    """
+    return len(voice_occupancy.get(channel.id, ()))
+
+# Function to check whether anybody is listening to a station
+def station_has_listeners(url):
+    """
+    Returns True if a guild that is not suspended plays the station or a
+    relay listener is connected to it.
+    """
+    if url in station_relays:
+        return True
+    for guild_id, entry in guild_playback.items():
+        if entry['url'] == url and guild_id not in suspended_guilds:
+            return True
+    # Guilds without saved state (e.g. right after !join) count as listening
+    return not guild_playback
+
+# Function to suspend the stream of a guild without listeners
+async def suspend_guild(guild):
+    """
+    Stops ffmpeg (and with it the upstream connection) in a guild whose voice
+    channel has been empty for the grace period.
+    """
+    idle_timers.pop(guild.id, None)
+    voice_client = guild.voice_client
+    if not voice_client or not voice_client.channel or listener_count(voice_client.channel) > 0:
+        return
+    suspended_guilds.add(guild.id)
+    stop_playback(voice_client)
+    logger.info(f"No listeners in {voice_client.channel.name} ({guild.name}), stream suspended")
+
+# Function to resume the stream of a guild when somebody joins
+async def resume_guild(guild):
+    """
+    Restarts the guild's station with a pre-buffered source.
+    """
+    if guild.id not in suspended_guilds:
+        return
+    suspended_guilds.discard(guild.id)
+    voice_client = guild.voice_client
+    entry = guild_playback.get(guild.id)
+    url = entry['url'] if entry and entry['url'] else current_stream_url
+    if not voice_client or not url:
+        return
+    try:
+        player = await create_prebuffered_player(url)
+        stop_playback(voice_client)
+        voice_client.play(
+            player,
+            after=lambda e: bot.loop.create_task(check_and_restart_stream(guild, url, e))
+        )
+        logger.info(f"Listener joined {voice_client.channel.name} ({guild.name}), stream resumed")
+    except Exception as e:
+        logger.error(f"Error resuming stream in {guild.name}: {e}")
+
+# Function to suspend or resume a guild depending on its listeners
+def evaluate_idle(guild):
+    """
+    Starts the grace timer when the bot's channel becomes empty, cancels it
+    (and resumes a suspended stream) when somebody is listening again.
+    """
+    voice_client = guild.voice_client
+    if not voice_client or not voice_client.channel:
+        timer = idle_timers.pop(guild.id, None)
+        if timer:
+            timer.cancel()
+        suspended_guilds.discard(guild.id)
+        return
+    if listener_count(voice_client.channel) == 0:
+        if IDLE_SUSPEND and guild.id not in suspended_guilds and guild.id not in idle_timers:
+            idle_timers[guild.id] = bot.loop.call_later(
+                IDLE_GRACE_SECONDS,
+                lambda: bot.loop.create_task(suspend_guild(guild))
+            )
+    else:
+        timer = idle_timers.pop(guild.id, None)
+        if timer:
+            timer.cancel()
+        if guild.id in suspended_guilds:
+            bot.loop.create_task(resume_guild(guild))
+
 # Background task to monitor the stream and push updates only when the track actually changes
 
 def load_banned_titles():
@@ -237,23 +1783,52 @@ def load_banned_titles():
 
 BANNED_TITLES = load_banned_titles()
 
+def contains_tokens(tokens, needle):
+    """Checks if the token sequence needle appears in tokens on word boundaries."""
+    size = len(needle)
+    return size > 0 and any(tokens[i:i + size] == needle for i in range(len(tokens) - size + 1))
+
+@functools.lru_cache(maxsize=1024)
+def track_tokens(title):
+    """Returns the normalized (artist tokens, title tokens) of the parsed track title."""
+    artist, name = split_track_title(title)
+    return normalize_search_text(artist).split(), normalize_search_text(name).split()
+
 def is_title_banned(title: str) -> bool:
-    """Checks if any entry from the banlist is contained in the title (case-insensitive)."""
-    return any(banned.lower() in title.lower() for banned in BANNED_TITLES)
+    """
+    Checks the banlist against the parsed artist/title of the track on word boundaries.
+    "Artist - Title" entries must match both parts, other entries either one.
+    """
+    artist_tokens, name_tokens = track_tokens(title)
+    for banned in BANNED_TITLES:
+        banned_artist, banned_name = track_tokens(banned)
+        if banned_artist:
+            if contains_tokens(artist_tokens, banned_artist) and contains_tokens(name_tokens, banned_name):
+                return True
+        elif contains_tokens(artist_tokens, banned_name) or contains_tokens(name_tokens, banned_name):
+            return True
+    return False
 
 @tasks.loop(seconds=5)
 async def monitor_track():
     global last_posted_title
     try:
-        if not current_stream_url:
+        if not current_stream_url or not station_has_listeners(current_stream_url):
             return
         title = await get_stream_title(current_stream_url)
+        if title:
+            station_titles[current_stream_url] = title
         if not title or is_title_banned(title):
             if title and is_title_banned(title):
                 logger.info(f"Track '{title}' matches banlist, skipping update.")
             return
-        if title != last_posted_title:
+        # Re-announcements of the same track (other casing, "(Radio Edit)", ...) are not pushed again
+        if track_key(title) != track_key(last_posted_title):
             last_posted_title = title
+            for guild in bot.guilds:
+                entry = guild_playback.get(guild.id)
+                if entry and entry['url'] == current_stream_url:
+                    update_playback_state(guild, title=title)
 
             # --- Deine Push-Logik, z.B. Embed bauen und posten ---
             cover_url = await fetch_cover_image_url(title)
@@ -277,6 +1852,480 @@ async def monitor_track():
     except Exception as e:
         logger.error(f"Error in monitor_track: {e}")
 
+# Function to list the stations the bot is currently pulling
+def playing_station_urls():
+    """
+    Returns the station URLs that are currently played in any guild (connected
+    and not suspended) and can be relayed.
+    """
+    urls = set()
+    for guild_id, entry in guild_playback.items():
+        guild = bot.get_guild(guild_id)
+        if (entry['url'] and guild and guild.voice_client and guild.voice_client.is_connected()
+                and guild_id not in suspended_guilds and is_relayable(entry['url'])):
+            urls.add(entry['url'])
+    return urls
+
+# Function to check whether a URL points to an HLS playlist
+def is_hls_url(url):
+    return urlparse(url).path.lower().endswith('.m3u8')
+
+# Function to check whether a station can be passed through the relay
+def is_relayable(url):
+    """
+    HLS streams are a playlist of segments, not a continuous body the relay
+    could pass through. Page URLs are relayable if yt-dlp gave a direct media URL.
+    """
+    if is_hls_url(url):
+        return False
+    if needs_extraction(url):
+        media = ytdl_cache.get(url)
+        return media is None or not is_hls_url(media['url'])
+    entry = resolved_streams.get(url)
+    return not (entry and is_hls_url(entry['mirrors'][0]))
+
+# Function to build an ICY metadata block for a title
+@functools.lru_cache(maxsize=64)
+def icy_metadata_block(title):
+    """
+    Encodes the title as ICY metadata block (length byte + payload padded to 16 bytes).
+    Cached, so every listener shares the same encoded block.
+    """
+    payload = f"StreamTitle='{title.replace(chr(39), chr(8217))}';".encode('utf-8')[:4080]
+    blocks = -(-len(payload) // 16)
+    return bytes([blocks]) + payload.ljust(blocks * 16, b'\0')
+
+class StationRelay:
+    """
+    Shares one upstream connection of a station between all local HTTP listeners.
+    Chunks are fanned out as-is (no re-encode); the last few are kept in a ring
+    buffer so new listeners start with a short burst instead of silence.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.ring = collections.deque(maxlen=RELAY_BURST_CHUNKS)
+        self.listeners = set()
+        self.content_type = 'audio/mpeg'
+        self.task = None
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=RELAY_LISTENER_QUEUE)
+        for chunk in list(self.ring)[-(RELAY_LISTENER_QUEUE - 1):]:
+            queue.put_nowait(chunk)
+        self.listeners.add(queue)
+        if self.task is None:
+            self.task = asyncio.create_task(self.pump())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.listeners.discard(queue)
+
+    def drop(self, queue):
+        """
+        Disconnects a listener: clears its backlog and queues the end marker.
+        """
+        self.listeners.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    async def pump(self):
+        """
+        Reads the upstream stream and fans the chunks out to all listeners.
+        Slow listeners whose queue is full are dropped instead of buffered.
+        """
+        try:
+            if needs_extraction(self.url):
+                media = await resolve_media(self.url)
+                stream_url, headers = media['url'], media['headers']
+            else:
+                stream_url, headers = await resolve_stream_url(self.url), None
+            if is_hls_url(stream_url):
+                raise ValueError("HLS streams cannot be relayed")
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=RESOLVER_PROBE_TIMEOUT, sock_read=30)
+            async with get_http_session().get(stream_url, headers=headers, timeout=timeout) as response:
+                response.raise_for_status()
+                self.content_type = response.headers.get('Content-Type', 'audio/mpeg')
+                media_type = self.content_type.split(';')[0].strip().lower()
+                if media_type in PLAYLIST_CONTENT_TYPES or media_type.startswith('text/'):
+                    raise ValueError(f"upstream is not an audio stream ({self.content_type})")
+                logger.info(f"Relay upstream opened for {self.url}")
+                async for chunk in response.content.iter_any():
+                    if not self.listeners or self.url not in playing_station_urls():
+                        break
+                    self.ring.append(chunk)
+                    for queue in list(self.listeners):
+                        try:
+                            queue.put_nowait(chunk)
+                        except asyncio.QueueFull:
+                            logger.warning(f"Dropping slow relay listener on {self.url}")
+                            self.drop(queue)
+        except ValueError as e:
+            logger.warning(f"Cannot relay {self.url}: {e}")
+        except Exception as e:
+            logger.error(f"Relay upstream error for {self.url}: {e}")
+            mark_stream_failed(self.url)
+        finally:
+            for queue in list(self.listeners):
+                self.drop(queue)
+            self.ring.clear()
+            self.task = None
+            station_relays.pop(self.url, None)
+            logger.info(f"Relay upstream closed for {self.url}")
+
+# HTTP handler that re-serves a currently playing station
+async def relay_handler(request):
+    """
+    Streams the requested station (or the current one) to a local listener,
+    with ICY metadata injected when the client asks for it.
+    """
+    from aiohttp import web
+    index = request.match_info.get('index')
+    if index is None:
+        url = current_stream_url
+    else:
+        station_names = list(radio_stations.keys())
+        if not index.isdigit() or not 1 <= int(index) <= len(station_names):
+            raise web.HTTPNotFound(text="Unknown station")
+        url = radio_stations[station_names[int(index) - 1]]
+    if not url or url not in playing_station_urls():
+        raise web.HTTPNotFound(text="Station is not playing")
+
+    relay = station_relays.get(url)
+    if relay is None:
+        relay = station_relays[url] = StationRelay(url)
+    queue = relay.subscribe()
+    try:
+        chunk = await queue.get()
+        if chunk is None:
+            raise web.HTTPBadGateway(text="Upstream not available")
+
+        icy = request.headers.get('Icy-MetaData') == '1'
+        station_name = next((name for name, u in radio_stations.items() if u == url), "Custom URL")
+        headers = {
+            'Content-Type': relay.content_type,
+            'Cache-Control': 'no-cache',
+            'icy-name': station_name
+        }
+        if icy:
+            headers['icy-metaint'] = str(RELAY_METAINT)
+        response = web.StreamResponse(headers=headers)
+        await response.prepare(request)
+        logger.info(f"Relay listener connected from {request.remote} ({station_name})")
+
+        remaining = RELAY_METAINT
+        sent_title = None
+        while chunk is not None:
+            if not icy:
+                await response.write(chunk)
+            else:
+                while chunk:
+                    part, chunk = chunk[:remaining], chunk[remaining:]
+                    await response.write(part)
+                    remaining -= len(part)
+                    if remaining == 0:
+                        title = station_titles.get(url, '')
+                        await response.write(icy_metadata_block(title) if title != sent_title else b'\0')
+                        sent_title = title
+                        remaining = RELAY_METAINT
+            chunk = await queue.get()
+        return response
+    except (ConnectionResetError, asyncio.CancelledError):
+        logger.info(f"Relay listener disconnected from {request.remote}")
+        raise
+    finally:
+        relay.unsubscribe(queue)
+
+class LoopWatchdog:
+    """
+    Always-on slow-callback detector. A tiny task on the event loop updates a
+    heartbeat; a watcher thread logs the loop thread's stack whenever the
+    heartbeat is older than the threshold, i.e. a callback is blocking the loop.
+    """
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.interval = threshold / 4
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.slow_callbacks = 0
+        self.task = asyncio.create_task(self.heartbeat())
+        self.thread = threading.Thread(target=self.watch, name='loop-watchdog', daemon=True)
+        self.thread.start()
+
+    async def heartbeat(self):
+        while True:
+            self.last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def watch(self):
+        reported_beat = None
+        while True:
+            time.sleep(self.interval)
+            last_beat = self.last_beat
+            lag = time.monotonic() - last_beat - self.interval
+            if lag > self.threshold and last_beat != reported_beat:
+                reported_beat = last_beat
+                self.slow_callbacks += 1
+                frame = sys._current_frames().get(self.loop_thread_id)
+                stack = ''.join(traceback.format_stack(frame)) if frame else 'unavailable'
+                logger.warning(f"Event loop blocked for more than {lag * 1000:.0f} ms, stack:\n{stack}")
+
+# Function to start the slow-callback detector
+def start_loop_watchdog():
+    """
+    Starts the slow-callback detector once (disabled with slow_callback_ms = 0).
+    """
+    global loop_watchdog
+    if loop_watchdog is None and SLOW_CALLBACK_MS > 0:
+        loop_watchdog = LoopWatchdog(SLOW_CALLBACK_MS / 1000)
+        logger.info(f"Slow-callback detector active (threshold {SLOW_CALLBACK_MS} ms)")
+
+# Function that samples the stacks of all threads (runs in its own thread)
+def sample_stacks(seconds):
+    """
+    Samples the stacks of all threads for the given time and returns them in
+    the folded format used by flamegraph.pl/speedscope ("frame;frame;frame count").
+    """
+    own_thread_id = threading.get_ident()
+    counts = collections.Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread_id:
+                continue
+            stack = []
+            while frame:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(thread_names.get(thread_id, str(thread_id)))
+            counts[';'.join(reversed(stack))] += 1
+        time.sleep(PROFILE_SAMPLE_INTERVAL)
+    return '\n'.join(f"{stack} {count}" for stack, count in counts.most_common()) + '\n'
+
+# Function to take a sampling profile plus a memory diff
+async def run_profile(seconds):
+    """
+    Samples all thread stacks for the given time while comparing two
+    tracemalloc snapshots. Returns (folded stacks, memory diff report).
+    """
+    async with profile_lock:
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(10)
+        try:
+            before = tracemalloc.take_snapshot()
+            folded = await asyncio.get_running_loop().run_in_executor(None, sample_stacks, seconds)
+            after = tracemalloc.take_snapshot()
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+
+        stats = after.compare_to(before, 'lineno')
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        memory_report = [f"tracemalloc diff over {seconds}s (top 25 by growth)"]
+        memory_report += [str(stat) for stat in stats[:25]]
+        if current:
+            memory_report.append(f"traced: {current / 1024:.0f} KiB, peak: {peak / 1024:.0f} KiB")
+        logger.info(f"Profile taken over {seconds}s ({folded.count(chr(10))} unique stacks)")
+        return folded, '\n'.join(memory_report) + '\n'
+
+# HTTP handler that triggers a profile
+async def profile_handler(request):
+    """
+    Takes a profile (?seconds=N) and returns the folded stacks as file.
+    Requires the configured http_token as Bearer token (never in the URL,
+    which ends up in the access log).
+    """
+    from aiohttp import web
+    authorization = request.headers.get('Authorization', '')
+    supplied = authorization[7:] if authorization.startswith('Bearer ') else ''
+    if not PROFILE_TOKEN or not hmac.compare_digest(supplied.encode(), PROFILE_TOKEN.encode()):
+        raise web.HTTPForbidden(text="Invalid token")
+    try:
+        seconds = min(max(int(request.query.get('seconds', '10')), 1), PROFILE_MAX_SECONDS)
+    except ValueError:
+        raise web.HTTPBadRequest(text="seconds must be a number")
+    if profile_lock.locked():
+        raise web.HTTPConflict(text="A profile is already running")
+
+    folded, memory_report = await run_profile(seconds)
+    logger.info(memory_report)
+    filename = f"profile-{datetime.now():%Y%m%d-%H%M%S}.folded"
+    return web.Response(
+        text=folded,
+        content_type='text/plain',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+# Function to start the local HTTP server
+async def start_http_server():
+    """
+    Starts the local HTTP server if the stream relay or the profile trigger
+    is enabled in the configuration.
+    """
+    global relay_runner
+    if not (RELAY_ENABLED or PROFILE_TOKEN) or relay_runner:
+        return
+    from aiohttp import web
+    try:
+        app = web.Application()
+        if RELAY_ENABLED:
+            app.router.add_get('/stream', relay_handler)
+            app.router.add_get('/stream/{index}', relay_handler)
+        if PROFILE_TOKEN:
+            app.router.add_get('/debug/profile', profile_handler)
+        relay_runner = web.AppRunner(app)
+        await relay_runner.setup()
+        await web.TCPSite(relay_runner, RELAY_HOST, RELAY_PORT).start()
+        logger.info(f"HTTP server listening on http://{RELAY_HOST}:{RELAY_PORT}")
+    except Exception as e:
+        logger.error(f"Could not start HTTP server: {e}")
+        relay_runner = None
+
+# Function to find a station by number or name
+def find_station(reference):
+    """
+    Returns (station name, URL) for a station number, exact name or best search match.
+    """
+    station_names = list(radio_stations.keys())
+    if reference.isdigit():
+        index = int(reference)
+        if 1 <= index <= len(station_names):
+            return station_names[index - 1], radio_stations[station_names[index - 1]]
+        return None, None
+    if reference in radio_stations:
+        return reference, radio_stations[reference]
+    matches = station_index.search(reference, limit=1)
+    if matches:
+        name = station_index.names[matches[0]]
+        return name, radio_stations[name]
+    return None, None
+
+# Function to switch a guild to the scheduled station without a gap
+async def run_scheduled_transition(entry, fire_at):
+    """
+    Pre-connects and buffers the scheduled station before the slot boundary,
+    then swaps it into the running player exactly at the boundary.
+    """
+    global current_stream_url
+    default_channel = bot.get_channel(default_voice_channel_id)
+    guild = bot.get_guild(entry.guild_id) if entry.guild_id else (default_channel.guild if default_channel else None)
+    station_name, url = find_station(entry.station)
+    if not guild or not url:
+        logger.warning(f"Schedule entry '{entry.name}': guild or station '{entry.station}' not found")
+        return
+    voice_client = guild.voice_client
+    state = guild_playback.get(guild.id)
+    if not voice_client or not voice_client.is_connected():
+        logger.info(f"Schedule entry '{entry.name}' skipped: not connected in {guild.name}")
+        return
+    if state and state['url'] == url:
+        return
+
+    # Nobody is listening: nothing to pre-warm, decide at the boundary
+    player = None
+    if guild.id not in suspended_guilds:
+        try:
+            player = await create_prebuffered_player(url)
+        except Exception as e:
+            logger.error(f"Error pre-warming {station_name} for schedule entry '{entry.name}': {e}")
+            return
+    await asyncio.sleep(max(0, fire_at - time.time()))
+    if not voice_client.is_connected() or guild.id in suspended_guilds:
+        if player is not None:
+            player.cleanup()
+        if voice_client.is_connected():
+            # Only record the new station, resume_guild starts it later
+            update_playback_state(guild, url=url)
+            suspended_guilds.add(guild.id)
+            logger.info(f"Scheduled switch to {station_name} in {guild.name} (suspended)")
+        return
+    if player is None:
+        # A listener joined during the pre-warm window and resume_guild restarted the old station
+        try:
+            player = await create_prebuffered_player(url)
+        except Exception as e:
+            logger.error(f"Error starting {station_name} for schedule entry '{entry.name}': {e}")
+            return
+
+    update_playback_state(guild, channel=voice_client.channel, url=url)
+    if default_channel and guild == default_channel.guild:
+        current_stream_url = url
+
+    after_playing = lambda e: bot.loop.create_task(check_and_restart_stream(guild, url, e))
+    old_source = voice_client.source
+    paused = voice_client.is_paused()
+    if voice_client.is_playing() or paused:
+        # Swap the source inside the running player, so there is no gap at the boundary.
+        # discord.py keeps the after callback on its internal player, point it at the new station.
+        voice_client.source = player
+        if getattr(voice_client, '_player', None) is not None:
+            voice_client._player.after = after_playing
+        if paused:
+            # Setting the source always resumes the player
+            voice_client.pause()
+        if old_source is not None:
+            bot.loop.run_in_executor(None, old_source.cleanup)
+    else:
+        voice_client.play(player, after=after_playing)
+    logger.info(f"Scheduled switch to {station_name} in {guild.name} ('{entry.name}')")
+    await nickname_change(guild, station_name, guild.me)
+
+# Task driving all schedule entries
+async def run_schedule():
+    """
+    Single task for every schedule entry: sleeps until the earliest pre-warm
+    time in the heap, starts that transition and re-queues the entry with its
+    next slot. Idle entries cost nothing but their heap slot.
+    """
+    now = time.time()
+    schedule_heap.clear()
+    for sequence, entry in enumerate(SCHEDULE_ENTRIES):
+        try:
+            schedule_heap.append((entry.next_fire(now), sequence, entry))
+        except ValueError as e:
+            logger.error(f"Schedule entry '{entry.name}' is never due: {e}")
+    heapq.heapify(schedule_heap)
+    logger.info(f"Scheduler started with {len(schedule_heap)} entr{'y' if len(schedule_heap) == 1 else 'ies'}")
+
+    while schedule_heap:
+        fire_at, sequence, entry = schedule_heap[0]
+        delay = fire_at - SCHEDULE_PREWARM_SECONDS - time.time()
+        if delay > 0:
+            # Wake up at least hourly, so wall clock jumps (DST, NTP) are picked up
+            await asyncio.sleep(min(delay, 3600))
+            continue
+        heapq.heappop(schedule_heap)
+        bot.loop.create_task(run_scheduled_transition(entry, fire_at))
+        try:
+            heapq.heappush(schedule_heap, (entry.next_fire(fire_at), sequence, entry))
+        except ValueError:
+            pass
+
+# Function to start the scheduler
+def start_schedule():
+    """
+    Starts the scheduler task once if schedule entries are configured.
+    """
+    global schedule_task
+    if SCHEDULE_ENTRIES and (schedule_task is None or schedule_task.done()):
+        schedule_task = bot.loop.create_task(run_schedule())
+
+# Task to reap zombie ffmpeg children and drop exited ones from the table
+@tasks.loop(seconds=30)
+async def reap_children():
+    """
+    Keeps the process table of the supervisor accurate between commands.
+    """
+    try:
+        process_supervisor.reap()
+    except Exception as e:
+        logger.error(f"Error in reap_children task: {e}")
+
 # Task for automatic fix execution (every 6 hours)
 @tasks.loop(hours=6)
 async def auto_fix():
@@ -309,7 +2358,7 @@ async def auto_fix():
                     embed.set_thumbnail(url="https://cdn-icons-png.flaticon.com/512/727/727245.png")
                     embed.set_footer(
                         text="This was triggered by the auto-fix system.",
-                        icon_url=guild.icon.url if guild.icon else discord.Embed.Empty
+                        icon_url=guild.icon.url if guild.icon else None
                     )
                     embed.timestamp = datetime.now()
 
@@ -325,6 +2374,29 @@ async def auto_fix():
     except Exception as e:
         logger.error(f"Error in auto_fix task: {e}")
 
+# Function to register the slash commands
+async def sync_slash_commands():
+    """
+    Registers the slash commands with Discord once per process.
+    """
+    global commands_synced
+    if commands_synced:
+        return
+    try:
+        synced = await bot.tree.sync()
+        commands_synced = True
+        logger.info(f"Synced {len(synced)} slash command(s)")
+    except Exception as e:
+        logger.error(f"Could not sync slash commands: {e}")
+
+# Event that triggers when the gateway connection is established (after login)
+@bot.event
+async def on_connect():
+    """
+    Records the login stage of the startup timeline.
+    """
+    mark_startup('login')
+
 # Event that triggers when the bot is ready
 @bot.event
 async def on_ready():
@@ -333,42 +2405,36 @@ async def on_ready():
     """
     logger.info(f"Logged in as {bot.user}")
     global current_stream_url
+    first_ready = 'ready' not in startup_timeline
+    mark_startup('ready')
     current_stream_url = default_stream_url
 
-    # Start background tasks
-    monitor_track.start()
-    auto_fix.start()
-    logger.info("Started update_activity and auto_fix tasks")
+    # Shared HTTP client for Spotify, the stream resolver and the relay
+    get_http_session()
 
-    # Connect to default voice channel and start default station
-    default_channel = bot.get_channel(default_voice_channel_id)
-    if default_channel:
-        try:
-            if not default_channel.guild.voice_client:
-                await default_channel.connect()
-                logger.info(f"Connected to default channel: {default_channel.name}")
-                station_name = next((name for name, url in radio_stations.items() if url == default_stream_url), "Unknown Station")
-                voice_client = default_channel.guild.voice_client
-                audio_source = discord.FFmpegPCMAudio(default_stream_url)
-                voice_client.play(audio_source)
-                logger.info(f"Playing {station_name} in default channel: {default_channel.name}")
-            else:
-                logger.info(f"Already connected to voice channel: {default_channel.name}")
-                if default_channel.guild.voice_client.is_playing():
-                    logger.info(f"Default station already playing in: {default_channel.name}")
-                else:
-                    station_name = next((name for name, url in radio_stations.items() if url == default_stream_url), "Unknown Station")
-                    voice_client = default_channel.guild.voice_client
-                    audio_source = discord.FFmpegPCMAudio(default_stream_url)
-                    voice_client.play(audio_source)
-                    logger.info(f"Started playing {station_name} in: {default_channel.name}")
-        except Exception as e:
-            logger.error(f"Error in on_ready event: {e}")
-
-    # Update nicknames in all guilds
+    # Start background tasks
+    for task in (monitor_track, auto_fix, reap_children):
+        if not task.is_running():
+            task.start()
+    logger.info("Started update_activity, auto_fix and reap_children tasks")
+
+    # Start the slow-callback detector
+    start_loop_watchdog()
+
+    # Reconnect every previously active guild and start its station. The local
+    # HTTP server (optional) and the slash command sync run concurrently.
+    rebuild_voice_occupancy()
+    await asyncio.gather(
+        restore_playback_state(),
+        start_http_server(),
+        sync_slash_commands()
+    )
     for guild in bot.guilds:
-        station_name = next((name for name, url in radio_stations.items() if url == current_stream_url), "Unknown Station")
-        await nickname_change(guild, station_name, bot.user)
+        evaluate_idle(guild)
+    start_schedule()
+
+    if first_ready:
+        log_startup_timeline()
 
 # Command to fix/restart the current stream with logging and event loop safe callback
 @bot.command(name='fix', help='Fixes the FFmpeg stream by restarting it')
@@ -412,17 +2478,18 @@ async def fix_stream(ctx):
             if error:
                 logger.error(f"Playback error: {error} in {ctx.guild.name}")
             bot.loop.create_task(
-                check_and_restart_stream(ctx.guild, current_stream_url)
+                check_and_restart_stream(ctx.guild, current_stream_url, error)
             )
 
         # Stop current stream if playing
         if ctx.voice_client.is_playing():
-            ctx.voice_client.stop()
+            stop_playback(ctx.voice_client)
             logger.info(f"Stopped current stream in {ctx.guild.name}")
 
         await asyncio.sleep(1)
 
-        player = discord.FFmpegPCMAudio(current_stream_url, **ffmpeg_options)
+        update_playback_state(ctx.guild, channel=ctx.voice_client.channel, url=current_stream_url)
+        player = await create_player(current_stream_url)
         ctx.voice_client.play(player, after=after_playing)
 
         station_name = next((name for name, url in radio_stations.items() if url == current_stream_url), "Unknown Station")
@@ -436,7 +2503,7 @@ async def fix_stream(ctx):
         embed.set_thumbnail(url="https://cdn-icons-png.flaticon.com/512/727/727245.png")  # Optional: add your own stream/radio icon
         embed.set_footer(
             text=f"Requested by {ctx.author.display_name}",
-            icon_url=ctx.author.avatar.url if ctx.author.avatar else discord.Embed.Empty
+            icon_url=ctx.author.avatar.url if ctx.author.avatar else None
         )
         embed.timestamp = datetime.now()
 
@@ -477,7 +2544,7 @@ async def play(ctx, arg):
 
     if ctx.voice_client:
         if ctx.voice_client.is_playing():
-            ctx.voice_client.stop()
+            stop_playback(ctx.voice_client)
             logger.info("Stopped current playback")
 
         try:
@@ -500,13 +2567,15 @@ async def play(ctx, arg):
                 station_name = "Custom URL"
                 current_stream_url = url
 
+            update_playback_state(ctx.guild, channel=ctx.voice_client.channel, url=url)
+
             async with ctx.typing():
                 title = await get_stream_title(url)
                 if title:
-                    player = discord.FFmpegPCMAudio(url, **ffmpeg_options)
+                    player = await create_player(url)
                     ctx.voice_client.play(
                         player, 
-                        after=lambda e: bot.loop.create_task(check_and_restart_stream(ctx.guild, url))
+                        after=lambda e: bot.loop.create_task(check_and_restart_stream(ctx.guild, url, e))
                     )
                     # Optional: Cover holen
                     cover_url = await fetch_cover_image_url(title)
@@ -534,92 +2603,155 @@ async def play(ctx, arg):
                 color=discord.Color.red()
             ))
 
-# Command to show available radio stations with a dropdown to play another station
-@bot.command(name='radio', help='Displays available radio stations')
-@commands.check(lambda ctx: ctx.channel.id == channel_id and any(role.id in allowed_role_ids for role in ctx.author.roles))
-async def stations(ctx):
+# Function to switch the guild to a station from an interaction (dropdown or slash command)
+async def switch_station(interaction, index):
     """
-    Shows a visually enhanced dropdown menu for all available radio stations except the currently playing one.
+    Switches the guild of the interaction to the station with the given number.
     """
     global current_stream_url
 
-    logger.info(f"Radio command initiated by {ctx.author} in {ctx.guild.name}")
-
-    if not radio_stations:
-        await ctx.send("No radio stations available.")
+    station_names = list(radio_stations.keys())
+    if not 1 <= index <= len(station_names):
+        await interaction.response.send_message("Unknown station.", ephemeral=True)
         return
-
-    current_station_name = next((name for name, url in radio_stations.items() if url == current_stream_url), None)
-    options = [
-        discord.SelectOption(
-            label=f"🎵 {station_name}",
-            value=str(index),
-            description=f"Select to play {station_name}"
+    station_name = station_names[index - 1]
+    url = radio_stations[station_name]
+
+    if current_stream_url != url:
+        guild = interaction.guild
+        voice_client = guild.voice_client
+
+        current_stream_url = url  # Always update the current stream
+
+        if voice_client and voice_client.is_connected():
+            # Resolving the station can take longer than Discord's 3 seconds to answer
+            await interaction.response.defer(ephemeral=True)
+            update_playback_state(guild, channel=voice_client.channel, url=url)
+            stop_playback(voice_client)
+            player = await create_player(url)
+            voice_client.play(
+                player,
+                after=lambda e: bot.loop.create_task(check_and_restart_stream(guild, url, e))
+            )
+            await nickname_change(guild, station_name, guild.me)
+            logger.info(f"Now playing: {station_name} in {guild.name}")
+            embed = discord.Embed(
+                title="✅ Station switched!",
+                description=f"Now playing: **{station_name}**",
+                color=discord.Color.green()
+            )
+            embed.set_footer(text="Enjoy your music! 🎶")
+            await interaction.followup.send(embed=embed, ephemeral=True)
+        else:
+            await interaction.response.send_message("Bot is not in the voice channel! Please use !join.", ephemeral=True)
+    else:
+        embed = discord.Embed(
+            title="ℹ️ Already Playing",
+            description=f"**{station_name}** is already playing.",
+            color=discord.Color.orange()
         )
-        for index, station_name in enumerate(radio_stations.keys(), start=1)
-        if station_name != current_station_name
-    ]
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
-    select = discord.ui.Select(placeholder="🎧 Choose a radio station...", options=options, min_values=1, max_values=1)
+class StationSelectView(View):
+    """
+    Station dropdown with previous/next buttons for more than 25 stations.
+    The select options of every page are precomputed.
+    """
 
-    async def select_callback(interaction):
-        global current_stream_url
+    def __init__(self, pages):
+        super().__init__(timeout=300)
+        self.pages = pages
+        self.page = 0
+        self.select = discord.ui.Select(min_values=1, max_values=1, options=pages[0])
+        self.select.callback = self.select_callback
+        self.add_item(self.select)
+        if len(pages) > 1:
+            self.previous_button = Button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+            self.next_button = Button(label="Next ▶", style=discord.ButtonStyle.secondary)
+            self.previous_button.callback = lambda interaction: self.turn(interaction, -1)
+            self.next_button.callback = lambda interaction: self.turn(interaction, 1)
+            self.add_item(self.previous_button)
+            self.add_item(self.next_button)
+        self.render()
+
+    def render(self):
+        self.select.options = self.pages[self.page]
+        self.select.placeholder = "🎧 Choose a radio station..."
+        if len(self.pages) > 1:
+            self.select.placeholder += f" (page {self.page + 1}/{len(self.pages)})"
+            self.previous_button.disabled = self.page == 0
+            self.next_button.disabled = self.page == len(self.pages) - 1
+
+    async def turn(self, interaction, step):
+        self.page = max(0, min(self.page + step, len(self.pages) - 1))
+        self.render()
+        await interaction.response.edit_message(view=self)
+
+    async def select_callback(self, interaction):
+        await switch_station(interaction, int(self.select.values[0]))
 
-        index = int(select.values[0])
-        station_names = list(radio_stations.keys())
-        station_name = station_names[index - 1]
-        url = radio_stations[station_name]
-
-        if current_stream_url != url:
-            guild = interaction.guild
-            voice_client = guild.voice_client
+# Command to show available radio stations with a dropdown to play another station
+@bot.command(name='radio', help='Displays available radio stations')
+@commands.check(lambda ctx: ctx.channel.id == channel_id and any(role.id in allowed_role_ids for role in ctx.author.roles))
+async def stations(ctx, *, query: str = None):
+    """
+    Shows a paginated dropdown menu of all radio stations, or of the stations matching the query.
+    """
+    logger.info(f"Radio command initiated by {ctx.author} in {ctx.guild.name}")
 
-            current_stream_url = url  # Always update the current stream
+    if not radio_stations:
+        await ctx.send("No radio stations available.")
+        return
 
-            if voice_client and voice_client.is_connected():
-                if voice_client.is_playing():
-                    voice_client.stop()
-                player = discord.FFmpegPCMAudio(url, **ffmpeg_options)
-                voice_client.play(
-                    player,
-                    after=lambda e: bot.loop.create_task(check_and_restart_stream(guild, url))
-                )
-                await nickname_change(guild, station_name, guild.me)
-                logger.info(f"Now playing: {station_name} in {guild.name}")
-                embed = discord.Embed(
-                    title="✅ Station switched!",
-                    description=f"Now playing: **{station_name}**",
-                    color=discord.Color.green()
-                )
-                embed.set_footer(text="Enjoy your music! 🎶")
-                await interaction.response.send_message(embed=embed, ephemeral=True)
-            else:
-                await interaction.response.send_message("Bot is not in the voice channel! Please use !join.", ephemeral=True)
-        else:
-            embed = discord.Embed(
-                title="ℹ️ Already Playing",
-                description=f"**{station_name}** is already playing.",
+    if query:
+        pages = station_index.build_select_pages(station_index.search(query, limit=100))
+        if not pages:
+            await ctx.send(embed=discord.Embed(
+                description=f":mag: **No station matches** `{query}`.",
                 color=discord.Color.orange()
-            )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
-
-    select.callback = select_callback
-    view = discord.ui.View()
-    view.add_item(select)
+            ))
+            return
+    else:
+        pages = station_index.select_pages
 
     embed = discord.Embed(
         title="📻 Select a Radio Station",
         description="Use the dropdown below to switch to another station.\n\n"
-                    "The currently playing station is not shown.",
+                    "Use the buttons to browse the pages or `!radio <name>` to search.",
         color=discord.Color.purple()
     )
     embed.set_footer(
         text="Tip: Use !listradio to see all stations with direct links.",
-        icon_url=ctx.guild.icon.url if ctx.guild.icon else discord.Embed.Empty
+        icon_url=ctx.guild.icon.url if ctx.guild.icon else None
     )
     embed.timestamp = datetime.now()
 
-    await ctx.send(embed=embed, view=view)
+    await ctx.send(embed=embed, view=StationSelectView(pages))
+
+# Slash command to switch the station with autocomplete
+@bot.tree.command(name='radio', description='Switches to a radio station')
+@app_commands.describe(station='Name or tag of the station')
+async def radio_slash(interaction: discord.Interaction, station: str):
+    """
+    Switches the station; the option is autocompleted from the station index.
+    """
+    if interaction.channel_id != channel_id or not any(role.id in allowed_role_ids for role in interaction.user.roles):
+        await interaction.response.send_message("You don't have permission to use this command or wrong channel.", ephemeral=True)
+        return
+    logger.info(f"Radio slash command initiated by {interaction.user} with station: {station}")
+    if station.isdigit():
+        index = int(station)
+    else:
+        matches = station_index.search(station, limit=1)
+        index = matches[0] + 1 if matches else 0
+    await switch_station(interaction, index)
+
+@radio_slash.autocomplete('station')
+async def radio_autocomplete(interaction: discord.Interaction, current: str):
+    return [
+        app_commands.Choice(name=station_index.names[i][:100], value=str(i + 1))
+        for i in station_index.search(current, limit=25)
+    ]
 
 # Command to stop playback
 @bot.command(name='stop', help='Stops the playback')
@@ -630,7 +2762,7 @@ async def stop(ctx):
     """
     logger.info(f"Stop command initiated by {ctx.author}")
     if ctx.voice_client:
-        ctx.voice_client.stop()
+        stop_playback(ctx.voice_client)
         logger.info("Playback stopped")
         await ctx.send("Playback stopped")
     else:
@@ -697,12 +2829,179 @@ async def leave(ctx):
     logger.info(f"Leave command initiated by {ctx.author}")
     if ctx.voice_client:
         await ctx.voice_client.disconnect()
+        clear_playback_state(ctx.guild)
         logger.info("Left voice channel")
         await ctx.send("Left voice channel")
     else:
         await ctx.send("I am not in a voice channel!")
         logger.info("Leave command failed: Not in a voice channel")
 
+# Command to replay the current station from some seconds ago
+@bot.command(name='rewind', help='Plays the current station from some seconds ago')
+@commands.check(lambda ctx: ctx.channel.id == channel_id and any(role.id in allowed_role_ids for role in ctx.author.roles))
+async def rewind(ctx, seconds: int):
+    """
+    Seeks inside the station's timeshift buffer, nothing is fetched from upstream.
+    """
+    logger.info(f"Rewind command initiated by {ctx.author} with value: {seconds}")
+    source = find_timeshift_source(ctx.voice_client.source) if ctx.voice_client else None
+    if not source:
+        await ctx.send(embed=discord.Embed(
+            description=":x: **Timeshift is not available for the current stream.**",
+            color=discord.Color.red()
+        ))
+        return
+    applied = source.seek(seconds)
+    embed = discord.Embed(
+        title="⏪ Rewound",
+        description=f"Playing **{applied}s** behind live.\nUse `!live` to jump back to the live stream.",
+        color=discord.Color.blurple()
+    )
+    if applied < seconds:
+        embed.set_footer(text=f"Only {applied}s are buffered for this station.")
+    await ctx.send(embed=embed)
+    logger.info(f"Rewound {applied}s in {ctx.guild.name}")
+
+# Command to jump back to the live stream
+@bot.command(name='live', help='Jumps back to the live stream')
+@commands.check(lambda ctx: ctx.channel.id == channel_id and any(role.id in allowed_role_ids for role in ctx.author.roles))
+async def live(ctx):
+    """
+    Leaves the timeshift and plays the live stream again.
+    """
+    logger.info(f"Live command initiated by {ctx.author}")
+    source = find_timeshift_source(ctx.voice_client.source) if ctx.voice_client else None
+    if not source:
+        await ctx.send("Timeshift is not available for the current stream.")
+        return
+    source.seek(0)
+    await ctx.send(embed=discord.Embed(
+        title="🔴 Live",
+        description="Back to the live stream.",
+        color=discord.Color.green()
+    ))
+    logger.info(f"Back to live in {ctx.guild.name}")
+
+# Command to show the upcoming scheduled station changes
+@bot.command(name='schedule', help='Shows the upcoming scheduled station changes')
+@commands.check(lambda ctx: ctx.channel.id == channel_id and any(role.id in allowed_role_ids for role in ctx.author.roles))
+async def schedule(ctx):
+    """
+    Lists the next scheduled station changes from the scheduler's heap.
+    """
+    logger.info(f"Schedule command initiated by {ctx.author}")
+    upcoming = heapq.nsmallest(10, schedule_heap)
+    if not upcoming:
+        await ctx.send("No station changes are scheduled. Add entries to the [schedule] section of config.ini.")
+        return
+    embed = discord.Embed(
+        title="🗓️ Upcoming Station Changes",
+        color=discord.Color.blurple()
+    )
+    for fire_at, _, entry in upcoming:
+        station_name, _ = find_station(entry.station)
+        embed.add_field(
+            name=f"{datetime.fromtimestamp(fire_at):%a %d.%m. %H:%M}",
+            value=f"**{station_name or entry.station}** ({entry.name})",
+            inline=False
+        )
+    embed.set_footer(text=f"{len(schedule_heap)} schedule entries")
+    embed.timestamp = datetime.now()
+    await ctx.send(embed=embed)
+
+# Command to show the ffmpeg process table
+@bot.command(name='procs', help='Shows all ffmpeg processes of the bot')
+@commands.check(lambda ctx: ctx.channel.id == channel_id and any(role.id in allowed_role_ids for role in ctx.author.roles))
+async def procs(ctx):
+    """
+    Shows every supervised ffmpeg child with its CPU, RSS and lifetime.
+    """
+    logger.info(f"Procs command initiated by {ctx.author}")
+    rows = process_supervisor.snapshot()
+    lines = [f"{'PID':>7} {'KIND':<8} {'CPU%':>5} {'RSS MB':>7} {'AGE':>7}  SOURCE"]
+    for pid, kind, label, cpu, rss, age in sorted(rows, key=lambda row: row[5], reverse=True)[:20]:
+        lines.append(f"{pid:>7} {kind:<8} {cpu:>5.1f} {rss:>7.1f} {age:>6.0f}s  {label[:40]}")
+    if not rows:
+        lines.append("(no ffmpeg processes running)")
+    embed = discord.Embed(
+        title="⚙️ ffmpeg Processes",
+        description="```\n" + "\n".join(lines) + "\n```",
+        color=discord.Color.dark_grey()
+    )
+    embed.set_footer(
+        text=f"{len(rows)}/{process_supervisor.max_processes} processes • "
+             f"{process_supervisor.timeouts} metadata timeouts since start"
+    )
+    embed.timestamp = datetime.now()
+    await ctx.send(embed=embed)
+
+# Command to show the outbound HTTP statistics
+@bot.command(name='http', help='Shows latency and connection reuse per host')
+@commands.check(lambda ctx: ctx.channel.id == channel_id and any(role.id in allowed_role_ids for role in ctx.author.roles))
+async def http(ctx):
+    """
+    Shows the shared HTTP client's statistics per host: requests, errors,
+    average/max latency, reused vs. new connections and DNS lookups.
+    """
+    logger.info(f"Http command initiated by {ctx.author}")
+    lines = [f"{'HOST':<28} {'REQ':>5} {'ERR':>4} {'AVG MS':>7} {'MAX MS':>7} {'REUSE':>6} {'DNS':>4}"]
+    for host, stats in sorted(http_stats.items(), key=lambda item: item[1]['requests'], reverse=True)[:15]:
+        completed = stats['requests'] - stats['errors']
+        average = stats['latency'] / completed * 1000 if completed else 0
+        connections = stats['new_connections'] + stats['reused_connections']
+        reuse = stats['reused_connections'] / connections * 100 if connections else 0
+        lines.append(
+            f"{(host or '?')[:28]:<28} {stats['requests']:>5} {stats['errors']:>4} {average:>7.0f} "
+            f"{stats['max_latency'] * 1000:>7.0f} {reuse:>5.0f}% {stats['dns_misses']:>4}"
+        )
+    if not http_stats:
+        lines.append("(no outbound requests yet)")
+    embed = discord.Embed(
+        title="🌐 Outbound HTTP",
+        description="```\n" + "\n".join(lines) + "\n```",
+        color=discord.Color.dark_grey()
+    )
+    new_connections = sum(stats['new_connections'] for stats in http_stats.values())
+    reused_connections = sum(stats['reused_connections'] for stats in http_stats.values())
+    embed.set_footer(
+        text=f"Limit {HTTP_LIMIT} ({HTTP_LIMIT_PER_HOST} per host) • DNS cache {HTTP_DNS_CACHE_TTL}s • "
+             f"{reused_connections} reused / {new_connections} new connections"
+    )
+    embed.timestamp = datetime.now()
+    await ctx.send(embed=embed)
+
+# Command to take a sampling profile of the bot
+@bot.command(name='profile', help='Takes a sampling profile for the given seconds')
+@commands.check(lambda ctx: ctx.channel.id == channel_id and any(role.id in allowed_role_ids for role in ctx.author.roles))
+async def profile(ctx, seconds: int = 10):
+    """
+    Samples all thread stacks and memory allocations and sends a flamegraph-compatible
+    file (folded stacks) plus the tracemalloc diff.
+    """
+    logger.info(f"Profile command initiated by {ctx.author} for {seconds}s")
+    if profile_lock.locked():
+        await ctx.send("A profile is already running.")
+        return
+    seconds = min(max(seconds, 1), PROFILE_MAX_SECONDS)
+
+    async with ctx.typing():
+        folded, memory_report = await run_profile(seconds)
+    stamp = f"{datetime.now():%Y%m%d-%H%M%S}"
+    files = [
+        discord.File(io.BytesIO(folded.encode()), filename=f"profile-{stamp}.folded"),
+        discord.File(io.BytesIO(memory_report.encode()), filename=f"tracemalloc-{stamp}.txt")
+    ]
+    embed = discord.Embed(
+        title="🩺 Profile Ready",
+        description=f"Sampled all threads for **{seconds}s**.\n"
+                    "Open the `.folded` file with flamegraph.pl or speedscope.app.",
+        color=discord.Color.blurple()
+    )
+    if loop_watchdog:
+        embed.add_field(name="Slow callbacks since start", value=str(loop_watchdog.slow_callbacks), inline=False)
+    embed.timestamp = datetime.now()
+    await ctx.send(embed=embed, files=files)
+
 # Custom help command with detailed command information
 @bot.command(name='help', help='Shows all available commands')
 @commands.check(lambda ctx: ctx.channel.id == channel_id and any(role.id in allowed_role_ids for role in ctx.author.roles))
@@ -716,15 +3015,27 @@ async def help(ctx, command: str = None):
             command_details = {
                 'radio': {
                     'title': '📻 Radio Command',
-                    'description': 'Shows a dropdown menu with all available radio stations.',
-                    'usage': '!radio',
-                    'example': 'Just type !radio and select a station from the dropdown menu.'
+                    'description': 'Shows a dropdown menu with all available radio stations, or the ones matching a search. Also available as /radio with autocomplete.',
+                    'usage': '!radio [search]',
+                    'example': '!radio\n!radio rock'
                 },
                 'play': {
                     'title': '▶️ Play Command',
-                    'description': 'Plays a radio station by number or direct stream URL.',
+                    'description': 'Plays a radio station by number, direct stream URL or YouTube/SoundCloud link.',
                     'usage': '!play <number/URL>',
-                    'example': '!play 1\n!play http://stream.url'
+                    'example': '!play 1\n!play http://stream.url\n!play https://www.youtube.com/watch?v=...'
+                },
+                'rewind': {
+                    'title': '⏪ Rewind Command',
+                    'description': 'Plays the current station from some seconds ago (timeshift).',
+                    'usage': '!rewind <seconds>',
+                    'example': '!rewind 120'
+                },
+                'live': {
+                    'title': '🔴 Live Command',
+                    'description': 'Jumps back to the live stream after !rewind.',
+                    'usage': '!live',
+                    'example': 'Just type !live to leave the timeshift.'
                 },
                 'fix': {
                     'title': '🔧 Fix Command',
@@ -792,6 +3103,30 @@ async def help(ctx, command: str = None):
                     'usage': '!restart',
                     'example': 'Just type !restart to reboot the bot.'
                 },
+                'schedule': {
+                    'title': '🗓️ Schedule Command',
+                    'description': 'Shows the upcoming scheduled station changes from config.ini.',
+                    'usage': '!schedule',
+                    'example': 'Just type !schedule to see the next station changes.'
+                },
+                'procs': {
+                    'title': '⚙️ Procs Command',
+                    'description': 'Shows all ffmpeg processes with CPU, memory and lifetime.',
+                    'usage': '!procs',
+                    'example': 'Just type !procs to see the process table.'
+                },
+                'http': {
+                    'title': '🌐 Http Command',
+                    'description': 'Shows latency, errors and connection reuse of outbound HTTP requests per host.',
+                    'usage': '!http',
+                    'example': 'Just type !http to see the statistics.'
+                },
+                'profile': {
+                    'title': '🩺 Profile Command',
+                    'description': 'Takes a sampling profile and memory diff of the bot (flamegraph file).',
+                    'usage': '!profile <seconds>',
+                    'example': '!profile 15'
+                },
                 'reload': {
                     'title': '🔃 Reload Command',
                     'description': 'Reloads the bot configuration.',
@@ -821,7 +3156,7 @@ async def help(ctx, command: str = None):
             )
             embed.add_field(
                 name="📻 Radio Controls",
-                value="```\n!radio    - Show available stations\n!play #   - Play station by number\n!play URL - Play custom stream URL\n!stop     - Stop current playback\n!vol 0-100- Adjust volume\n!fix      - Fix stream issues```",
+                value="```\n!radio    - Show available stations\n!play #   - Play station by number\n!play URL - Play custom stream URL\n!stop     - Stop current playback\n!vol 0-100- Adjust volume\n!fix      - Fix stream issues\n!rewind # - Replay from # seconds ago\n!live     - Back to the live stream```",
                 inline=False
             )
             embed.add_field(
@@ -831,7 +3166,7 @@ async def help(ctx, command: str = None):
             )
             embed.add_field(
                 name="⚙️ Station Management",
-                value="```\n!add      - Add new radio station\n!remove   - Remove a radio station\n!listradio- List all radio stations```",
+                value="```\n!add      - Add new radio station\n!remove   - Remove a radio station\n!listradio- List all radio stations\n!schedule - Show scheduled station changes```",
                 inline=False
             )
             embed.add_field(
@@ -841,7 +3176,7 @@ async def help(ctx, command: str = None):
             )
             embed.add_field(
                 name="🔧 Admin Commands",
-                value="```\n!setdefault - Set default stream URL\n!restart    - Restart the bot\n!reload     - Reload configuration```",
+                value="```\n!setdefault - Set default stream URL\n!restart    - Restart the bot\n!reload     - Reload configuration\n!profile #  - Profile the bot for # seconds\n!procs      - Show ffmpeg processes\n!http       - Show outbound HTTP statistics```",
                 inline=False
             )
             embed.set_footer(
@@ -854,6 +3189,51 @@ async def help(ctx, command: str = None):
         logger.error(f"Error in help command: {e}")
         await ctx.send(f"Error displaying help: {str(e)}")
 
+class StationListView(View):
+    """
+    Previous/next buttons for !listradio, one precomputed page of stations per embed.
+    """
+
+    def __init__(self, guild):
+        super().__init__(timeout=300)
+        self.guild = guild
+        self.page = 0
+        self.pages = station_index.list_pages
+        self.previous_button = Button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+        self.next_button = Button(label="Next ▶", style=discord.ButtonStyle.secondary)
+        self.previous_button.callback = lambda interaction: self.turn(interaction, -1)
+        self.next_button.callback = lambda interaction: self.turn(interaction, 1)
+        self.add_item(self.previous_button)
+        self.add_item(self.next_button)
+
+    def build_embed(self):
+        self.previous_button.disabled = self.page == 0
+        self.next_button.disabled = self.page >= len(self.pages) - 1
+        embed = discord.Embed(
+            title="📻 All Available Radio Stations",
+            description="Here you can find all configured radio stations for this server.\n\n",
+            color=discord.Color.green()
+        )
+        for station_id in self.pages[self.page]:
+            name = station_index.names[station_id]
+            url = radio_stations[name]
+            is_current = "🟢 **Currently playing**" if url == current_stream_url else ""
+            embed.add_field(
+                name=f"➖ {station_id + 1}. {name}",
+                value=f"[▶️ Listen]({url})" + ("\n" + is_current if is_current else ""),
+                inline=False
+            )
+        embed.set_footer(
+            text=f"Page {self.page + 1}/{len(self.pages)} • Total Stations: {len(radio_stations)} • Use !radio to switch",
+            icon_url=self.guild.icon.url if self.guild.icon else None
+        )
+        embed.timestamp = datetime.now()
+        return embed
+
+    async def turn(self, interaction, step):
+        self.page = max(0, min(self.page + step, len(self.pages) - 1))
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
 @bot.command(name='listradio', help='Lists all configured radio stations')
 @commands.check(lambda ctx: ctx.channel.id == channel_id and any(role.id in allowed_role_ids for role in ctx.author.roles))
 async def listradio(ctx):
@@ -873,26 +3253,8 @@ async def listradio(ctx):
             logger.warning("No radio stations found in current configuration.")
             return
 
-        embed = discord.Embed(
-            title="📻 All Available Radio Stations",
-            description="Here you can find all configured radio stations for this server.\n\n",
-            color=discord.Color.green()
-        )
-        for index, (name, url) in enumerate(radio_stations.items(), 1):
-            is_current = "🟢 **Currently playing**" if url == current_stream_url else ""
-            embed.add_field(
-            name=f"➖ {index}. {name}",
-            value=f"[▶️ Listen]({url})" + ("\n" + is_current if is_current else ""),
-            inline=False
-        )
-
-        embed.set_footer(
-            text=f"Total Stations: {len(radio_stations)} • Use !radio to switch",
-            icon_url=ctx.guild.icon.url if ctx.guild.icon else discord.Embed.Empty
-        )
-        embed.timestamp = datetime.now()
-
-        await ctx.send(embed=embed)
+        view = StationListView(ctx.guild)
+        await ctx.send(embed=view.build_embed(), view=view if len(station_index.list_pages) > 1 else None)
         logger.info(f"Listed {len(radio_stations)} radio stations in {ctx.guild.name}")
 
     except Exception as e:
@@ -936,29 +3298,58 @@ async def on_resumed():
 @bot.event
 async def on_voice_state_update(member, before, after):
     """
-    Handles bot movement back to the default voice channel if left alone.
+    Keeps the voice occupancy up to date, suspends/resumes the stream depending
+    on listeners and moves the bot back to the default voice channel if left alone.
     """
+    if not member.bot and before.channel != after.channel:
+        if before.channel:
+            listeners = voice_occupancy.get(before.channel.id)
+            if listeners is not None:
+                listeners.discard(member.id)
+                if not listeners:
+                    del voice_occupancy[before.channel.id]
+        if after.channel:
+            voice_occupancy[after.channel.id].add(member.id)
+
     if member == bot.user:
+        if after.channel and member.guild.id in guild_playback:
+            update_playback_state(member.guild, channel=after.channel)
         await check_and_move_bot(member.guild)
     if before.channel and not after.channel:
         await check_and_move_bot(member.guild)
 
+    voice_client = member.guild.voice_client
+    if member == bot.user or (voice_client and voice_client.channel in (before.channel, after.channel)):
+        evaluate_idle(member.guild)
+
 async def check_and_move_bot(guild):
     """
     If the bot is alone in a voice channel, moves it back to the default channel.
     """
     voice_client = guild.voice_client
     if voice_client and voice_client.channel:
-        if len(voice_client.channel.members) == 1:
+        if listener_count(voice_client.channel) == 0:
             default_channel = bot.get_channel(default_voice_channel_id)
             if default_channel and voice_client.channel.id != default_channel.id:
                 await voice_client.move_to(default_channel)
                 logger.info(f"Bot moved back to default channel: {default_channel.name}")
 
 # Start the bot
+async def main():
+    """
+    Runs the bot and closes the shared HTTP client once it has shut down.
+    """
+    try:
+        async with bot:
+            await bot.start(token)
+    finally:
+        await close_http_session()
+
 if __name__ == "__main__":
     try:
         logger.info("Starting bot...")
-        bot.run(token)
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("Bot stopped")
     except Exception as e:
         logger.critical(f"Failed to start bot: {e}")